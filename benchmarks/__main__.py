@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""基准测试入口：在多个规模下分阶段计时并记录各阶段的峰值内存，结果输出为JSON
+
+python -m benchmarks --scales 10000,100000 --output bench_results.json
+"""
+import argparse
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.stages import run_scale
+
+
+def main():
+    parser = argparse.ArgumentParser(description="专利数据验证基准测试")
+    parser.add_argument("--scales", default="10000,100000", help="以逗号分隔的标注记录数")
+    parser.add_argument("--auth-records", type=int, default=None, help="授权记录数，默认与标注记录数相同")
+    parser.add_argument("--parts", type=int, default=10, help="分割文件数")
+    parser.add_argument("--check-gap", type=float, default=0.2, help="交叉验证重叠比例")
+    parser.add_argument("--hit-rate", type=float, default=0.9, help="专利公开号命中授权库的比例")
+    parser.add_argument("--mismatch-rate", type=float, default=0.05, help="重叠部分标注不一致的比例")
+    parser.add_argument("--workers", type=int, default=None, help="validate_files 的并行进程数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="JSON结果输出路径")
+    args = parser.parse_args()
+
+    records = []
+    # 每个规模在独立进程中运行，峰值内存互不影响
+    for scale in (int(value) for value in args.scales.split(",")):
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            records.extend(executor.submit(run_scale, scale, args.auth_records or scale, args.parts, args.check_gap,
+                                           args.hit_rate, args.mismatch_rate, args.seed, args.workers).result())
+
+    # 阶段内峰值与增量来自阶段运行时的采样；最后一列为进程生命周期峰值 ru_maxrss
+    for record in records:
+        delta = record['rss_delta_kb']
+        print(f"{record['scale']:>10} {record['stage']:<16} {record['seconds']:>9.3f}s "
+              f"{record['stage_peak_rss_kb'] or '-':>10} KB {'-' if delta is None else f'{delta:+d}':>10} KB "
+              f"{record['peak_rss_kb'] or '-':>10} KB")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"args": vars(args), "results": records}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""基准测试数据生成器：按给定规模、命中率与不一致率生成确定性的专利申请人JSON与标注CSV"""
+import csv
+import json
+import math
+import os
+import random
+
+CSV_HEADER = ["name", "now_name", "have_patent_fixed", "patent_fixed", "patent_publication_number"]
+
+
+def publication_number(i):
+    """第i条授权记录的授权公告号"""
+    return f"CN{100000000 + i}B"
+
+
+def generate_auth_json(json_path, n_records, seed=0):
+    """生成专利申请人JSON，逐条写出，不在内存中构建整个列表"""
+    rnd = random.Random(seed)
+    with open(json_path, 'w', encoding='utf-8') as f:
+        f.write('[\n')
+        for i in range(n_records):
+            if i:
+                f.write(',\n')
+            json.dump({
+                "授权公告号": publication_number(i),
+                "申请人": f"测试申请人{rnd.randrange(max(n_records // 10, 1))}有限公司",
+                "专利名称": f"一种测试装置及其方法{i}",
+                "申请日": f"20{rnd.randrange(10, 25)}-{rnd.randrange(1, 13):02d}-{rnd.randrange(1, 29):02d}",
+            }, f, ensure_ascii=False)
+        f.write('\n]\n')
+    return json_path
+
+
+def generate_rows(n_rows, n_auth, hit_rate=0.9, seed=0):
+    """生成标注记录；hit_rate比例的专利公开号取自授权库，其余为库中不存在的号码"""
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(n_rows):
+        has_patent = rnd.random() < 0.7
+        if not has_patent:
+            number = ""
+        elif n_auth and rnd.random() < hit_rate:
+            number = publication_number(rnd.randrange(n_auth))
+        else:
+            number = f"CN{900000000 + i}A"
+        rows.append([f"单位{i}", f"单位{i}有限公司" if rnd.random() < 0.95 else "",
+                     int(has_patent), int(has_patent), number])
+    return rows
+
+
+def generate_master_csv(csv_path, n_rows, n_auth, hit_rate=0.9, seed=0):
+    """生成待分割的原始标注CSV"""
+    with open(csv_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        writer.writerows(generate_rows(n_rows, n_auth, hit_rate, seed))
+    return csv_path
+
+
+def generate_parts(output_dir, n_parts, n_rows, n_auth, check_gap=0.2, hit_rate=0.9, mismatch_rate=0.05, seed=0):
+    """生成与 split_csv 相同布局的分割文件，重叠部分按mismatch_rate翻转have_patent_fixed以模拟标注不一致"""
+    rnd = random.Random(seed + 1)
+    rows = generate_rows(n_rows, n_auth, hit_rate, seed)
+    chunk_size = math.ceil(n_rows / n_parts)
+    chunks = [rows[i*chunk_size : min((i+1)*chunk_size, n_rows)] for i in range(n_parts)]
+
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for i in range(n_parts):
+        next_chunk = chunks[(i + 1) % n_parts]
+        overlap = [list(row) for row in next_chunk[:math.ceil(len(next_chunk) * check_gap)]]
+        for row in overlap:
+            if rnd.random() < mismatch_rate:
+                row[2] = 1 - row[2]
+
+        path = os.path.join(output_dir, f'part_{i+1}.csv')
+        with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADER)
+            writer.writerows(chunks[i])
+            writer.writerows(overlap)
+        paths.append(path)
+    return paths
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""基准测试各阶段：加载授权数据、解析、存在率、交叉验证、写出分割文件，逐阶段计时并记录峰值内存
+
+ru_maxrss 是进程整个生命周期的峰值，某个阶段之后的所有阶段都会报告同一个值；
+因此每个阶段运行时在后台线程中采样当前常驻内存，记录该阶段内的峰值及相对阶段开始时的增量。
+"""
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from patent_checker import checker, single_checker
+from patent_checker.auth_index import compile_auth_index, open_auth_index
+from patent_checker.splitter import split_csv
+
+from .generator import generate_auth_json, generate_master_csv, generate_parts
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# 阶段内当前常驻内存的采样间隔（秒），短于该间隔的内存尖峰可能漏采
+RSS_SAMPLE_INTERVAL = 0.005
+
+
+def peak_rss_kb():
+    """当前进程迄今为止的峰值常驻内存(KB)，不支持的平台返回None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 上 ru_maxrss 的单位是字节，Linux 上是KB
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def current_rss_kb():
+    """当前进程此刻的常驻内存(KB)，读取 /proc/self/statm，不支持的平台返回None"""
+    try:
+        with open("/proc/self/statm", 'rb') as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+class RssSampler:
+    """在后台线程中采样当前常驻内存，得到一个阶段内的峰值"""
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.start_kb = self.peak_kb = current_rss_kb()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        rss = current_rss_kb()
+        if rss is not None:
+            self.peak_kb = max(self.peak_kb, rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        if self.start_kb is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._sample()
+
+    @property
+    def delta_kb(self):
+        """阶段内峰值相对阶段开始时的增量"""
+        return None if self.start_kb is None else self.peak_kb - self.start_kb
+
+
+def run_scale(n_rows, n_auth, n_parts, check_gap, hit_rate, mismatch_rate, seed, workers):
+    """在单个规模下依次执行各阶段，返回每个阶段的计时记录"""
+    records = []
+    previous_disable = logging.root.manager.disable
+    # 日志输出不计入各阶段耗时
+    logging.disable(logging.CRITICAL)
+    try:
+        _run_stages(records, n_rows, n_auth, n_parts, check_gap, hit_rate, mismatch_rate, seed, workers)
+    finally:
+        logging.disable(previous_disable)
+    return records
+
+
+def _run_stages(records, n_rows, n_auth, n_parts, check_gap, hit_rate, mismatch_rate, seed, workers):
+    def timed(stage, func, rows=None):
+        with RssSampler() as sampler:
+            start = time.perf_counter()
+            value = func()
+            seconds = time.perf_counter() - start
+        records.append({"scale": n_rows, "stage": stage, "seconds": seconds, "rows": rows,
+                        "stage_peak_rss_kb": sampler.peak_kb, "rss_delta_kb": sampler.delta_kb,
+                        "peak_rss_kb": peak_rss_kb()})
+        return value
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_path = os.path.join(tmp_dir, "专利申请人.json")
+        master_path = os.path.join(tmp_dir, "master.csv")
+        timed("generate", lambda: (
+            generate_auth_json(json_path, n_auth, seed),
+            generate_master_csv(master_path, n_rows, n_auth, hit_rate, seed),
+        ))
+        part_files = generate_parts(os.path.join(tmp_dir, "parts"), n_parts, n_rows, n_auth,
+                                    check_gap, hit_rate, mismatch_rate, seed)
+
+        timed("load_auth_json", lambda: checker.create_authorization_dict(json_path), n_auth)
+        timed("compile_index", lambda: compile_auth_index(json_path), n_auth)
+        auth_index = timed("open_index", lambda: open_auth_index(json_path), n_auth)
+
+        timed("write_split", lambda: split_csv(master_path, n_parts, check_gap), n_rows)
+        parsed = timed("parse", lambda: [checker.read_csv_rows(path) for path in part_files], n_rows)
+        timed("existence", lambda: [checker.count_existence(rows, auth_index) for rows in parsed], n_rows)
+        heads = [rows[:checker.overlap_size(len(rows), check_gap)] for rows in parsed]
+        timed("cross_validate", lambda: [checker.cross_validate(rows, heads[(i + 1) % n_parts])
+                                         for i, rows in enumerate(parsed)], n_rows)
+        del parsed, heads
+
+        timed("validate_files", lambda: checker.validate_files(part_files, check_gap, json_path, workers=workers),
+              n_rows)
+        timed("single_check", lambda: single_checker.process_csv_file(master_path, auth_dict=auth_index), n_rows)
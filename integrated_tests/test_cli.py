@@ -1,4 +1,7 @@
 # integrated_tests/test_cli.py
+import csv
+import json
+
 from typer.testing import CliRunner
 from salary_calculator.__main__ import app
 
@@ -17,4 +20,36 @@ def test_with_pieces():
     result = runner.invoke(app, ["李四", "A", "30", "-p", "50,3;30,5"])
     assert result.exit_code == 0
     assert "李四" in result.stdout
-    assert "900.0" in result.stdout  # 改为匹配一位小数格式
\ No newline at end of file
+    assert "900.0" in result.stdout  # 改为匹配一位小数格式
+
+def test_batch(tmp_path):
+    input_csv = tmp_path / "interns.csv"
+    input_csv.write_text("name,level,hours,quantity,rate\n"
+                         "张三,B,40,,\n"
+                         "李四,A,30,50,3\n"
+                         "李四,A,30,30,5\n", encoding="utf-8")
+    result = runner.invoke(app, ["batch", str(input_csv)])
+    assert result.exit_code == 0
+    assert "总薪资: 1900.0" in result.stdout
+
+    with open(tmp_path / "interns_payroll.csv", encoding="utf-8-sig") as f:
+        rows = {row["name"]: row for row in csv.DictReader(f)}
+    assert float(rows["张三"]["total"]) == 1000.0
+    assert float(rows["李四"]["piece_wage"]) == 300.0
+    summary = json.loads((tmp_path / "interns_payroll.json").read_text(encoding="utf-8"))
+    assert summary["interns"] == 2
+    assert summary["by_level"]["A"] == {"interns": 1, "total": 900.0}
+
+
+def test_batch_reports_every_invalid_row(tmp_path):
+    input_csv = tmp_path / "interns.csv"
+    input_csv.write_text("name,level,hours,quantity,rate\n"
+                         "张三,X,40,,\n"
+                         "李四,A,30,50,3\n"
+                         "王五,A,-1,5,abc\n", encoding="utf-8")
+    result = runner.invoke(app, ["batch", str(input_csv)])
+    assert result.exit_code == 1
+    assert "第2行 张三: 未知职级 'X'" in result.output
+    assert "第4行 王五: 工时 不能为负数" in result.output
+    assert "第4行 王五: 计件单价不是数字：abc" in result.output
+    assert not (tmp_path / "interns_payroll.csv").exists()
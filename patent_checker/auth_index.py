@@ -0,0 +1,553 @@
+"""授权公告号索引：将专利申请人JSON一次性编译为可内存映射的磁盘索引，源文件大小或修改时间变化时自动重建"""
+import array
+import bisect
+import codecs
+import json
+import logging
+import os
+import struct
+import time
+
+LOGGER = logging.getLogger(__name__)
+
+KEY_FIELD = '授权公告号'
+
+# 索引文件格式：64字节文件头 + 定长排序键数组 + (偏移, 长度)载荷数组
+INDEX_MAGIC = b'PCAIDX01'
+INDEX_VERSION = 1
+_HEADER = struct.Struct('<8sIIQqQ')  # magic, 版本, 键宽度, 源文件大小, 源文件mtime_ns, 记录数
+_HEADER_SIZE = 64
+
+_WHITESPACE = ' \t\r\n\ufeff'
+
+
+def iter_json_array(json_path, chunk_size=1024 * 1024):
+    """逐条解析顶层JSON数组，依次产出 (字节偏移, 字节长度, 记录)，不需要一次性读入整个文件"""
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    with open(json_path, 'rb') as file:
+        buf = ''
+        pos = 0  # buf中的当前字符位置
+        byte_pos = 0  # buf[pos]在文件中的字节偏移
+        eof = False
+        state = 'start'  # start -> first -> sep <-> item
+
+        while True:
+            # 跳过空白与BOM
+            skip = pos
+            while skip < len(buf) and buf[skip] in _WHITESPACE:
+                skip += 1
+            byte_pos += len(buf[pos:skip].encode('utf-8'))
+            pos = skip
+
+            if pos >= len(buf):
+                if eof:
+                    raise json.JSONDecodeError('Unexpected end of JSON array', buf, pos)
+                # 丢弃已消费的文本并读入下一块
+                chunk = file.read(chunk_size)
+                eof = not chunk
+                buf = buf[pos:] + text_decoder.decode(chunk, final=eof)
+                pos = 0
+                continue
+
+            char = buf[pos]
+            if state == 'start':
+                if char != '[':
+                    raise json.JSONDecodeError("Expecting '['", buf, pos)
+                state = 'first'
+                pos += 1
+                byte_pos += 1
+                continue
+            if state in ('first', 'sep') and char == ']':
+                return
+            if state == 'sep':
+                if char != ',':
+                    raise json.JSONDecodeError("Expecting ',' delimiter", buf, pos)
+                state = 'item'
+                pos += 1
+                byte_pos += 1
+                continue
+
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                end = len(buf)
+            if end >= len(buf) and not eof:
+                # 记录可能被截断在缓冲区末尾，读入更多数据后重试
+                chunk = file.read(chunk_size)
+                eof = not chunk
+                buf = buf[pos:] + text_decoder.decode(chunk, final=eof)
+                pos = 0
+                continue
+
+            length = len(buf[pos:end].encode('utf-8'))
+            yield byte_pos, length, item
+            byte_pos += length
+            pos = end
+            state = 'sep'
+
+
+def default_index_path(json_path):
+    """默认索引文件位置：与源JSON同目录的 .idx 文件"""
+    return str(json_path) + '.idx'
+
+
+def compile_auth_index(json_path, index_path=None, key_field=KEY_FIELD, key_func=None):
+    """将专利申请人JSON编译为授权公告号索引，返回索引文件路径
+
+    key_func 可将授权公告号转换为其他形式的键（如规范化后的号码），返回空值的记录被跳过
+    """
+    import numpy as np
+    start_time = time.perf_counter()
+    index_path = index_path or default_index_path(json_path)
+    stat = os.stat(json_path)
+
+    # 与 {item[key]: item} 的语义一致：重复的授权公告号以最后一条为准
+    payloads = {}
+    for offset, length, item in iter_json_array(json_path):
+        key = str(item[key_field])
+        if key_func:
+            key = key_func(key)
+            if not key:
+                continue
+        payloads[key.encode('utf-8')] = (offset, length)
+
+    count = len(payloads)
+    width = max((len(key) for key in payloads), default=1) or 1
+    keys = np.array(sorted(payloads), dtype=f'S{width}')
+    offsets = np.array([payloads[key] for key in keys.tolist()], dtype='<u8').reshape(count, 2)
+
+    tmp_path = f'{index_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as file:
+        header = _HEADER.pack(INDEX_MAGIC, INDEX_VERSION, width, stat.st_size, stat.st_mtime_ns, count)
+        file.write(header.ljust(_HEADER_SIZE, b'\0'))
+        file.write(keys.tobytes())
+        # 载荷数组按8字节对齐
+        file.write(b'\0' * (-(count * width) % 8))
+        file.write(offsets.tobytes())
+    os.replace(tmp_path, index_path)
+
+    LOGGER.info("授权号索引编译完毕 | 记录数: %d | 耗时: %.3f秒 | %s",
+                count, time.perf_counter() - start_time, index_path)
+    return index_path
+
+
+def _read_record(json_path, offset, length):
+    with open(json_path, 'rb') as file:
+        file.seek(offset)
+        return json.loads(file.read(length).decode('utf-8'))
+
+
+def iter_authorization_numbers(json_path, key_field=KEY_FIELD):
+    """流式产出授权公告号，读到一条即产出一条"""
+    for _, _, item in iter_json_array(json_path):
+        yield item[key_field]
+
+
+class AuthKeySet:
+    """只保存授权公告号的内存集合，完整记录按字节偏移从源JSON按需读取
+
+    key_func 可将授权公告号转换为其他形式的键（如规范化后的号码），返回空值的记录被跳过
+    """
+
+    def __init__(self, json_path=None, key_field=KEY_FIELD, key_func=None):
+        self.json_path = json_path
+        # 授权公告号 -> (偏移 << 32 | 长度)，每个键只占用一个整数
+        self._locations = {}
+        self.version = None
+        if json_path is not None:
+            stat = os.stat(json_path)
+            for offset, length, item in iter_json_array(json_path):
+                key = key_func(item[key_field]) if key_func else item[key_field]
+                if key_func and not key:
+                    continue
+                self._locations[key] = offset << 32 | length
+            self.version = f"{stat.st_size}-{stat.st_mtime_ns}-{len(self._locations)}"
+
+    def __len__(self):
+        return len(self._locations)
+
+    def __iter__(self):
+        return iter(self._locations)
+
+    def __contains__(self, key):
+        return key in self._locations
+
+    def isin(self, values):
+        """批量判断授权公告号是否存在，返回布尔数组"""
+        import numpy as np
+        return np.array([value in self._locations for value in values], dtype=bool)
+
+    def get(self, key, default=None):
+        """按需从源JSON读取该授权公告号对应的完整记录"""
+        location = self._locations.get(key)
+        if location is None or not self.json_path:
+            return default
+        return _read_record(self.json_path, location >> 32, location & 0xFFFFFFFF)
+
+    def __getitem__(self, key):
+        record = self.get(key)
+        if record is None:
+            raise KeyError(key)
+        return record
+
+
+# 布隆过滤器每个键的探测位数：逐个查询在Python中进行，探测位越多越慢；两位时
+# 每键10位的误判率约3%，已能让大部分不存在的号码跳过二分查找（CompactKeySet._position 中内联展开）
+BLOOM_PROBES = 2
+_HASH_PROBE = 'patent_checker.auth_index'
+_BUILD_CHUNK = 1 << 16
+# 记录位置打包为一个64位整数：40位字节偏移（源文件至多1TB）与24位记录长度
+_OFFSET_BITS = 40
+_LENGTH_BITS = 24
+
+
+class CompactKeySet:
+    """紧凑的授权公告号集合，语义与 AuthKeySet 相同，每个键只占键本身的字节数加约22字节
+
+    所有键的UTF-8编码连续存放在一个缓冲区中，按键的哈希值排序，另存排序后的哈希数组与偏移数组；
+    查询时在哈希高位对应的桶内二分查找哈希，再比较缓冲区中的原始字节，哈希相同的键逐个比较。
+    使用Python内置的字符串哈希（已缓存在字符串对象上），进程的哈希种子不同时（如pickle到spawn进程）重新排序。
+    bloom_bits_per_key 大于0时另建布隆过滤器，大部分不存在的号码不需要二分查找。
+    """
+
+    def __init__(self, json_path=None, key_field=KEY_FIELD, key_func=None, bloom_bits_per_key=0):
+        import numpy as np
+        self.json_path = json_path
+        self.bloom_bits_per_key = bloom_bits_per_key
+        self.version = None
+        # 加载期间同样只使用定长数组，峰值内存不超过最终结构的两倍左右
+        buffer = bytearray()
+        starts = array.array('Q')
+        hashes = array.array('q')
+        locations = array.array('Q')
+        if json_path is not None:
+            stat = os.stat(json_path)
+            for offset, length, item in iter_json_array(json_path):
+                key = key_func(item[key_field]) if key_func else item[key_field]
+                if key_func and not key:
+                    continue
+                key = str(key)
+                starts.append(len(buffer))
+                buffer += key.encode('utf-8')
+                hashes.append(hash(key))
+                if offset >> _OFFSET_BITS or length >> _LENGTH_BITS:
+                    raise ValueError(f"紧凑授权号集合只支持不超过1TB的源文件与16MB的单条记录: {json_path}")
+                locations.append(offset << _LENGTH_BITS | length)
+        starts.append(len(buffer))
+        self._build(buffer, np.frombuffer(starts, dtype=np.uint64), np.frombuffer(hashes, dtype=np.int64),
+                    np.frombuffer(locations, dtype=np.uint64), dedupe=True)
+
+        if json_path is not None:
+            self.version = f"{stat.st_size}-{stat.st_mtime_ns}-{self._count}"
+            LOGGER.info("紧凑授权号集合加载完毕 | 键数: %d | 占用: %.1fMB", self._count, self.nbytes / 1024 ** 2)
+
+    def _build(self, buffer, starts, hashes, locations, dedupe=False):
+        """按哈希重排缓冲区中的键；dedupe为True时重复的键以最后一条为准（与 {item[key]: item} 一致）"""
+        import numpy as np
+        start_view = memoryview(starts)
+        # 稳定排序后哈希相同的键保持原顺序
+        order = np.argsort(hashes, kind='stable')
+        if dedupe:
+            sorted_hashes = hashes[order]
+            keep = np.ones(len(order), dtype=bool)
+            # 哈希相同的连续区间 [first, last]，区间内每个不同的键只保留最后一条，总开销与区间长度成正比
+            same = np.concatenate(([False], sorted_hashes[1:] == sorted_hashes[:-1], [False]))
+            edges = np.diff(same.astype(np.int8))
+            for first, last in zip(np.flatnonzero(edges == 1).tolist(), np.flatnonzero(edges == -1).tolist()):
+                latest = {}
+                for pos in range(first, last + 1):
+                    index = int(order[pos])
+                    latest[bytes(buffer[start_view[index]:start_view[index + 1]])] = pos
+                keep[first:last + 1] = False
+                keep[list(latest.values())] = True
+            order = order[keep]
+
+        starts = starts.view(np.int64)
+        lengths = (starts[1:] - starts[:-1])[order]
+        offsets = np.zeros(len(order) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # 按新顺序分块搬移键的字节，避免为每个键生成Python对象
+        source = np.frombuffer(buffer, dtype=np.uint8)
+        target = np.empty(int(offsets[-1]), dtype=np.uint8)
+        for chunk in range(0, len(order), _BUILD_CHUNK):
+            chunk_start, chunk_stop = int(offsets[chunk]), int(offsets[min(chunk + _BUILD_CHUNK, len(order))])
+            chunk_order = order[chunk:chunk + _BUILD_CHUNK]
+            shift = starts[:-1][chunk_order] - offsets[chunk:chunk + len(chunk_order)]
+            target[chunk_start:chunk_stop] = source[np.repeat(shift, lengths[chunk:chunk + len(chunk_order)])
+                                                    + np.arange(chunk_start, chunk_stop)]
+        del source
+        self._buffer = target.tobytes()
+        del target
+        self._offsets = offsets.astype(np.uint32 if offsets[-1] < 2 ** 32 else np.uint64)
+        self._hashes = hashes[order]
+        self._locations = locations[order]
+        self._count = len(order)
+        self._hash_seed = hash(_HASH_PROBE)
+        self._index()
+
+    def _index(self):
+        """由排序后的哈希数组生成分桶目录与布隆过滤器"""
+        import numpy as np
+        # 按哈希高位分桶的目录（平均每桶约4个键），二分查找只在桶内进行
+        self._bucket_shift = 64 - max(1, (self._count // 4).bit_length())
+        buckets = (self._hashes.view(np.uint64) ^ np.uint64(1 << 63)) >> np.uint64(self._bucket_shift)
+        self._directory = np.searchsorted(buckets, np.arange((1 << (64 - self._bucket_shift)) + 1, dtype=np.uint64)
+                                          ).astype(self._offsets.dtype if self._count < 2 ** 32 else np.uint64)
+        # memoryview 的下标访问返回Python整数，逐个查询时比numpy标量快
+        self._hash_view = memoryview(self._hashes)
+        self._offset_view = memoryview(self._offsets)
+        self._directory_view = memoryview(self._directory)
+
+        self._bloom = None
+        if self.bloom_bits_per_key > 0 and self._count:
+            self._bloom_mask = (1 << max(6, int(self._count * self.bloom_bits_per_key - 1).bit_length())) - 1
+            bits = np.zeros((self._bloom_mask + 1) // 8, dtype=np.uint8)
+            for position in self._bloom_positions(self._hashes):
+                np.bitwise_or.at(bits, position >> np.uint64(3),
+                                 np.left_shift(1, position & np.uint64(7)).astype(np.uint8))
+            self._bloom = bits.tobytes()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ('_directory', '_bloom', '_hash_view', '_offset_view', '_directory_view'):
+            state.pop(name)
+        return state
+
+    def __setstate__(self, state):
+        import numpy as np
+        self.__dict__.update(state)
+        if self._hash_seed == hash(_HASH_PROBE):
+            self._index()
+            return
+        # 字符串哈希的种子随进程变化（如spawn启动的进程），重新计算哈希并排序
+        starts = self._offsets.astype(np.uint64)
+        offsets = memoryview(self._offsets)
+        hashes = np.fromiter((hash(self._buffer[offsets[pos]:offsets[pos + 1]].decode('utf-8'))
+                              for pos in range(self._count)), dtype=np.int64, count=self._count)
+        self._build(self._buffer, starts, hashes, self._locations)
+
+    @property
+    def nbytes(self):
+        """缓冲区、哈希、偏移、记录位置、分桶目录与布隆过滤器的总字节数"""
+        return (len(self._buffer) + self._hashes.nbytes + self._offsets.nbytes + self._locations.nbytes
+                + self._directory.nbytes + (len(self._bloom) if self._bloom else 0))
+
+    def _bloom_positions(self, hashes):
+        """双重哈希得到各探测位：低32位为起点，高32位（置为奇数）为步长"""
+        import numpy as np
+        hashes = hashes.view(np.uint64)
+        mask = np.uint64(self._bloom_mask)
+        start = hashes & np.uint64(0xFFFFFFFF)
+        step = (hashes >> np.uint64(32)) | np.uint64(1)
+        return [(start + np.uint64(i) * step) & mask for i in range(BLOOM_PROBES)]
+
+    def _key(self, pos):
+        return self._buffer[self._offset_view[pos]:self._offset_view[pos + 1]]
+
+    def _find(self, encoded, key_hash, pos):
+        """从哈希数组的pos处开始，在哈希相同的连续记录中查找键，返回位置或-1"""
+        while pos < self._count and self._hash_view[pos] == key_hash:
+            if self._key(pos) == encoded:
+                return pos
+            pos += 1
+        return -1
+
+    def _position(self, key):
+        if not isinstance(key, str):
+            return -1
+        key_hash = hash(key)
+        if self._bloom is not None:
+            # 与 _bloom_positions 相同的两位探测，内联以避免逐个查询时的函数调用开销
+            start = key_hash & 0xFFFFFFFF
+            position = start & self._bloom_mask
+            if not self._bloom[position >> 3] >> (position & 7) & 1:
+                return -1
+            position = (start + ((key_hash >> 32) & 0xFFFFFFFF | 1)) & self._bloom_mask
+            if not self._bloom[position >> 3] >> (position & 7) & 1:
+                return -1
+        bucket = (key_hash + (1 << 63)) >> self._bucket_shift
+        pos = bisect.bisect_left(self._hash_view, key_hash,
+                                 self._directory_view[bucket], self._directory_view[bucket + 1])
+        return self._find(key.encode('utf-8'), key_hash, pos)
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for pos in range(self._count):
+            yield self._key(pos).decode('utf-8')
+
+    def __contains__(self, key):
+        return self._position(key) >= 0
+
+    def isin(self, values):
+        """批量判断授权公告号是否存在，返回布尔数组"""
+        import numpy as np
+        values = list(values)
+        result = np.zeros(len(values), dtype=bool)
+        valid = [i for i, value in enumerate(values) if isinstance(value, str)]
+        if not self._count or not valid:
+            return result
+        hashes = np.fromiter((hash(values[i]) for i in valid), dtype=np.int64, count=len(valid))
+        candidates = np.ones(len(valid), dtype=bool)
+        if self._bloom is not None:
+            bits = np.frombuffer(self._bloom, dtype=np.uint8)
+            for position in self._bloom_positions(hashes):
+                candidates &= ((bits[position >> np.uint64(3)] >> (position & np.uint64(7)).astype(np.uint8))
+                               & 1).astype(bool)
+        pos = np.searchsorted(self._hashes, hashes)
+        candidates &= pos < self._count
+        candidates[candidates] = self._hashes[pos[candidates]] == hashes[candidates]
+        for i in np.flatnonzero(candidates).tolist():
+            result[valid[i]] = self._find(values[valid[i]].encode('utf-8'), int(hashes[i]), int(pos[i])) >= 0
+        return result
+
+    def get(self, key, default=None):
+        """按需从源JSON读取该授权公告号对应的完整记录"""
+        pos = self._position(key)
+        if pos < 0 or not self.json_path:
+            return default
+        location = int(self._locations[pos])
+        return _read_record(self.json_path, location >> _LENGTH_BITS, location & ((1 << _LENGTH_BITS) - 1))
+
+    def __getitem__(self, key):
+        record = self.get(key)
+        if record is None:
+            raise KeyError(key)
+        return record
+
+
+def load_authorization_keys(json_path, key_field=KEY_FIELD, key_func=None, compact=False, bloom_bits_per_key=0):
+    """流式读取专利申请人JSON，只保留授权公告号集合
+
+    compact为True时返回 CompactKeySet，内存占用约为字典的几分之一，适合在内存较小的节点上加载全量数据
+    """
+    if compact:
+        return CompactKeySet(json_path, key_field, key_func, bloom_bits_per_key)
+    return AuthKeySet(json_path, key_field, key_func)
+
+
+class AuthIndex:
+    """只读的授权公告号索引，键数组通过mmap共享，支持 `in`、批量查询与按需读取完整记录"""
+
+    def __init__(self, index_path, json_path=None):
+        import numpy as np
+        self.index_path = str(index_path)
+        self.json_path = json_path
+        with open(self.index_path, 'rb') as file:
+            header = file.read(_HEADER_SIZE)
+        if len(header) < _HEADER_SIZE:
+            raise ValueError(f"索引文件不完整: {self.index_path}")
+        magic, version, width, size, mtime_ns, count = _HEADER.unpack_from(header)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"索引文件格式不兼容: {self.index_path}")
+        self.width = width
+        self.source_size = size
+        self.source_mtime_ns = mtime_ns
+        self._count = count
+
+        if count:
+            self._keys = np.memmap(self.index_path, dtype=f'S{width}', mode='r',
+                                   offset=_HEADER_SIZE, shape=(count,))
+            offsets_start = _HEADER_SIZE + count * width + (-(count * width) % 8)
+            self._offsets = np.memmap(self.index_path, dtype='<u8', mode='r',
+                                      offset=offsets_start, shape=(count, 2))
+        else:
+            self._keys = np.empty(0, dtype=f'S{width}')
+            self._offsets = np.empty((0, 2), dtype='<u8')
+
+    @property
+    def version(self):
+        """索引版本标识，源文件变化后随之变化"""
+        return f"{self.source_size}-{self.source_mtime_ns}-{self._count}"
+
+    def is_stale(self, json_path=None):
+        """源JSON的大小或修改时间与编译时不一致时返回True"""
+        stat = os.stat(json_path or self.json_path)
+        return stat.st_size != self.source_size or stat.st_mtime_ns != self.source_mtime_ns
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for key in self._keys:
+            yield key.decode('utf-8')
+
+    def _position(self, key):
+        import numpy as np
+        if not isinstance(key, str):
+            return -1
+        encoded = key.encode('utf-8')
+        if not encoded or len(encoded) > self.width:
+            return -1
+        pos = int(np.searchsorted(self._keys, encoded))
+        if pos < self._count and self._keys[pos] == encoded:
+            return pos
+        return -1
+
+    def __contains__(self, key):
+        return self._position(key) >= 0
+
+    def isin(self, values):
+        """批量判断授权公告号是否存在，返回布尔数组"""
+        import numpy as np
+        values = list(values)
+        result = np.zeros(len(values), dtype=bool)
+        valid = [i for i, value in enumerate(values)
+                 if isinstance(value, str) and value
+                 and len(value.encode('utf-8')) <= self.width]
+        if not self._count or not valid:
+            return result
+        queries = np.array([values[i].encode('utf-8') for i in valid])
+        pos = np.searchsorted(self._keys, queries)
+        found = pos < self._count
+        found[found] = self._keys[pos[found]] == queries[found]
+        result[valid] = found
+        return result
+
+    def get(self, key, default=None):
+        """按需从源JSON读取该授权公告号对应的完整记录"""
+        pos = self._position(key)
+        if pos < 0 or not self.json_path:
+            return default
+        offset, length = (int(value) for value in self._offsets[pos])
+        return _read_record(self.json_path, offset, length)
+
+    def __getitem__(self, key):
+        record = self.get(key)
+        if record is None:
+            raise KeyError(key)
+        return record
+
+
+def open_auth_index(json_path, index_path=None, key_func=None):
+    """打开授权公告号索引；索引不存在、损坏或已过期时自动重新编译"""
+    if not os.path.exists(json_path):
+        raise FileNotFoundError(json_path)
+    index_path = index_path or default_index_path(json_path)
+
+    if os.path.exists(index_path):
+        try:
+            index = AuthIndex(index_path, json_path)
+        except ValueError:
+            LOGGER.warning("授权号索引损坏，重新编译: %s", index_path)
+        else:
+            if not index.is_stale():
+                return index
+            LOGGER.info("专利申请人数据已更新，重新编译索引: %s", index_path)
+
+    try:
+        compile_auth_index(json_path, index_path, key_func=key_func)
+    except OSError:
+        # 数据目录只读等情况下无法写索引，退回到流式加载的紧凑键集合（每个进程各自加载一份）
+        LOGGER.warning("无法写入授权号索引，改为流式加载授权公告号: %s", index_path)
+        return load_authorization_keys(json_path, key_func=key_func, compact=True)
+    return AuthIndex(index_path, json_path)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    compile_auth_index("data/专利申请人.json")
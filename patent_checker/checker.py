@@ -1,17 +1,32 @@
 """验收代码，csv_files参数为待匹配数据文件列表，需要与split_data.py中的文件列表顺序一致，check_gap参数为交叉验证的重叠比例"""
 import csv
+import itertools
 import math
 import json
 import logging
 from logging.handlers import RotatingFileHandler
 import time
 import os
+import traceback
+from operator import itemgetter
+
+from . import columnar_cache
+from .auth_index import AuthIndex, CompactKeySet, load_authorization_keys, open_auth_index
+from .consistency import DUPLICATE_POLICIES, DUPLICATES_LAST, overlap_join
+from .journal import RunJournal
+from .metrics import write_metrics
+from .normalizer import (
+    MATCH_EXACT, MATCH_KIND_CODE, MATCH_NORMALIZED, PublicationNumberIndex, open_publication_number_index,
+)
+from .result_cache import ResultCache
 
 
 # 配置日志系统
-def setup_logging():
-    """配置完整的日志系统"""
+def setup_logging(log_file='patent_validation.log'):
+    """配置完整的日志系统，重复调用不会重复添加处理器"""
     logger = logging.getLogger()
+    if any(handler.name == 'patent_checker.file' for handler in logger.handlers):
+        return
     logger.setLevel(logging.DEBUG)  # 采集所有级别日志
 
     # 控制台输出 (简洁格式)
@@ -19,10 +34,11 @@ def setup_logging():
     console_handler.setLevel(logging.INFO)
     console_format = logging.Formatter('%(levelname)-8s %(message)s')
     console_handler.setFormatter(console_format)
+    console_handler.set_name('patent_checker.console')
 
     # 文件输出 (详细格式+自动轮转)
     file_handler = RotatingFileHandler(
-        'patent_validation.log',
+        log_file,
         maxBytes=10 * 1024 * 1024,  # 10MB
         backupCount=5
     )
@@ -31,17 +47,18 @@ def setup_logging():
         datefmt='%Y-%m-%d %H:%M:%S'
     )
     file_handler.setFormatter(file_format)
+    file_handler.set_name('patent_checker.file')
 
     logger.addHandler(console_handler)
     logger.addHandler(file_handler)
 
 
-# 初始化日志系统
-setup_logging()
-
+def create_authorization_dict(json_path, keys_only=False, compact=False):
+    """创建授权号字典 - 增强错误处理和性能监控
 
-def create_authorization_dict(json_path):
-    """创建授权号字典 - 增强错误处理和性能监控"""
+    keys_only为True时流式读取JSON，只保留授权公告号集合，完整记录按需读取；
+    compact为True时（同时视为keys_only）使用紧凑集合 CompactKeySet
+    """
     start_time = time.perf_counter()
 
     try:
@@ -52,12 +69,15 @@ def create_authorization_dict(json_path):
             logging.error("文件不存在: %s", json_path)
             return {}
 
-        # 读取JSON文件
-        with open(json_path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
+        if keys_only or compact:
+            auth_dict = load_authorization_keys(json_path, compact=compact)
+        else:
+            # 读取JSON文件
+            with open(json_path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
 
-        # 创建字典
-        auth_dict = {item['授权公告号']: item for item in data}
+            # 创建字典
+            auth_dict = {item['授权公告号']: item for item in data}
 
         elapsed = time.perf_counter() - start_time
         logging.info("专利申请人数据读取完毕 | 记录数: %d | 耗时: %.3f秒",
@@ -75,8 +95,426 @@ def create_authorization_dict(json_path):
         return {}
 
 
-def validate_files(csv_files, check_gap=0.2, auth_dict_path="patent-checker-main/data/raw/专利申请人.json"):
-    """执行专利数据验证工作流"""
+def load_authorization_index(json_path):
+    """打开授权号索引（首次运行或数据更新时自动编译），替代每次完整解析JSON"""
+    start_time = time.perf_counter()
+
+    try:
+        logging.info("开始加载授权号索引: %s", json_path)
+
+        if not os.path.exists(json_path):
+            logging.error("文件不存在: %s", json_path)
+            return {}
+
+        auth_index = open_auth_index(json_path)
+
+        elapsed = time.perf_counter() - start_time
+        logging.info("授权号索引加载完毕 | 记录数: %d | 耗时: %.3f秒",
+                     len(auth_index), elapsed)
+        return auth_index
+
+    except json.JSONDecodeError:
+        logging.exception("JSON文件格式不正确: %s", json_path)
+        return {}
+    except Exception as e:
+        logging.exception("加载授权号索引时发生意外错误: %s", str(e))
+        return {}
+
+
+def read_csv_rows(file_path):
+    """读取整个CSV文件为字典列表；启用列式缓存时从内存映射的Arrow文件读取所需列"""
+    table = columnar_cache.load_table(file_path)
+    if table is not None:
+        return table.to_pylist()
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        return list(csv.DictReader(f))
+
+
+def read_csv_columns(file_path, limit=None):
+    """按列读取CSV中验证用到的列，返回 (行数, 列名 -> 值列表)，不为每行构建字典；启用列式缓存时值为Arrow列
+
+    与 csv.DictReader 的语义相同：跳过空行，缺少的字段为None，表头重复时取最后一列；文件中没有的列不出现在结果中。
+    limit 为只读取的开头行数。
+    """
+    table = columnar_cache.load_table(file_path)
+    if table is not None:
+        if limit is not None:
+            table = table.slice(0, limit)
+        # 直接返回Arrow列，交叉验证在Arrow中完成
+        return table.num_rows, {column: table.column(column) for column in table.column_names}
+
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        rows = list(itertools.islice(filter(None, reader), limit))
+    positions = {column: position for position, column in enumerate(header) if column in columnar_cache.COLUMNS}
+    columns = {}
+    full_rows = not rows or min(map(len, rows)) >= len(header)
+    for column, position in positions.items():
+        if full_rows:
+            columns[column] = list(map(itemgetter(position), rows))
+        else:
+            columns[column] = [row[position] if position < len(row) else None for row in rows]
+    return len(rows), columns
+
+
+def read_csv_head_columns(file_path, check_gap):
+    """按列只解析文件开头 ceil(n*check_gap) 行，返回 (总行数, 列名 -> 开头的值列表)"""
+    table = columnar_cache.load_table(file_path)
+    total_rows = table.num_rows if table is not None else count_csv_rows(file_path)
+    return total_rows, read_csv_columns(file_path, overlap_size(total_rows, check_gap))[1]
+
+
+def head_columns(columns, limit):
+    """列式表的开头 limit 行"""
+    return {column: values[:limit] for column, values in columns.items()}
+
+
+def count_csv_rows(file_path):
+    """只统计CSV数据行数（与DictReader一样跳过空行），不构建字典"""
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        return sum(1 for row in reader if row)
+
+
+def overlap_size(total_rows, check_gap):
+    """交叉验证使用的开头行数"""
+    return math.ceil(total_rows * check_gap)
+
+
+def read_csv_head(file_path, check_gap):
+    """只解析文件开头 ceil(n*check_gap) 行，返回 (总行数, 开头记录)"""
+    table = columnar_cache.load_table(file_path)
+    if table is not None:
+        return table.num_rows, table.slice(0, overlap_size(table.num_rows, check_gap)).to_pylist()
+    total_rows = count_csv_rows(file_path)
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        head = list(itertools.islice(csv.DictReader(f), overlap_size(total_rows, check_gap)))
+    return total_rows, head
+
+
+def count_existence(rows, auth_dict, log=None, tier_counts=None):
+    """统计专利号存在于授权库中的行数，返回 (存在数, 缺失专利号列表)
+
+    rows 为行字典列表或列式表（列名 -> 值列表）；
+    auth_dict 为容错索引（PublicationNumberIndex）时，各匹配层级的命中数累加到 tier_counts
+    """
+    exist_count = 0
+    missing_numbers = []
+    match = getattr(auth_dict, "match", None)
+    if isinstance(rows, dict):
+        pub_nums = rows.get("patent_publication_number")
+        if pub_nums is None:
+            pub_nums = [None] * len(next(iter(rows.values()), []))
+        elif hasattr(pub_nums, "to_pylist"):
+            pub_nums = pub_nums.to_pylist()
+    else:
+        pub_nums = [row.get("patent_publication_number") for row in rows]
+    # 授权索引（AuthIndex、CompactKeySet等）按文件一次批量查找，而不是逐行调用 __contains__
+    present = auth_dict.isin(pub_nums).tolist() if match is None and hasattr(auth_dict, "isin") else None
+
+    for row_idx, pub_num in enumerate(pub_nums, 1):
+        if not pub_num:
+            if log is not None:
+                log.append((logging.DEBUG, "第 %d 行缺少专利号", (row_idx,)))
+            continue
+
+        if present is not None:
+            found = present[row_idx - 1]
+        elif match is not None:
+            tier = match(pub_num)
+            if tier is not None and tier_counts is not None:
+                tier_counts[tier] = tier_counts.get(tier, 0) + 1
+            found = tier is not None
+        else:
+            found = pub_num in auth_dict
+
+        if found:
+            exist_count += 1
+        else:
+            missing_numbers.append(pub_num)
+
+    return exist_count, missing_numbers
+
+
+def cross_validate(current_rows, next_chunk, duplicates=DUPLICATES_LAST):
+    """按名称比对当前文件与下一个文件开头部分的 have_patent_fixed，返回 (一致数, 匹配数, 全部不一致名称)
+
+    重叠部分中重复出现的名称按 duplicates 策略取值，完整的不一致明细见 consistency.overlap_join
+    """
+    joined = overlap_join(current_rows, next_chunk, duplicates)
+    return joined["valid_count"], joined["match_count"], [row["name"] for row in joined["mismatches"]]
+
+
+def _exception_record(msg, *args):
+    """等价于 logging.exception 的缓冲日志记录"""
+    return logging.ERROR, msg + "\n%s", args + (traceback.format_exc().rstrip(),)
+
+
+def _check_file(index, total_files, file_path, next_file, check_gap, auth_dict,
+                parsed=None, prefetch_next=False, duplicates=DUPLICATES_LAST):
+    """验证单个文件的存在率及其与下一个文件开头部分的交叉验证一致率
+
+    返回原始计数；日志先缓冲在结果的 "log" 中，由调用方按文件顺序输出；
+    各阶段的读取量与耗时记录在结果的 "metrics" 中。
+    parsed 为单次运行内的解析缓存，prefetch_next 为True时完整解析下一个文件并放入缓存。
+    """
+    file_start = time.time()
+    log = []
+    metrics = {"worker": os.getpid(), "cache_hit": False, "bytes_read": 0, "rows_parsed": 0,
+               "parse_seconds": 0.0, "lookup_seconds": 0.0, "cross_validate_seconds": 0.0, "total_seconds": 0.0}
+    result = {"file": file_path, "next_file": next_file, "processed": False, "log": log, "metrics": metrics}
+    log.append((logging.INFO, "处理文件 [%d/%d]: %s", (index + 1, total_files, file_path)))
+
+    # 读取当前文件
+    stage_start = time.perf_counter()
+    try:
+        current = parsed["tables"].pop(file_path, None) if parsed is not None else None
+        if current is None:
+            current = read_csv_columns(file_path)
+            metrics["bytes_read"] += os.path.getsize(file_path)
+            metrics["rows_parsed"] += current[0]
+        current_total, current_columns = current
+        log.append((logging.DEBUG, "读取到 %d 条记录", (current_total,)))
+
+    except UnicodeDecodeError:
+        log.append(_exception_record("文件编码问题: %s", file_path))
+        metrics["total_seconds"] = time.time() - file_start
+        return result
+    except Exception:
+        log.append(_exception_record("读取文件失败: %s", file_path))
+        metrics["total_seconds"] = time.time() - file_start
+        return result
+    finally:
+        metrics["parse_seconds"] += time.perf_counter() - stage_start
+
+    if parsed is not None and index == 0:
+        parsed["heads"][file_path] = (current_total,
+                                     head_columns(current_columns, overlap_size(current_total, check_gap)))
+
+    if not current_total:
+        log.append((logging.WARNING, "文件为空: %s", (file_path,)))
+        metrics["total_seconds"] = time.time() - file_start
+        return result
+
+    # 验证存在率
+    stage_start = time.perf_counter()
+    tier_counts = {}
+    exist_count, missing_numbers = count_existence(current_columns, auth_dict, log, tier_counts)
+    metrics["lookup_seconds"] = time.perf_counter() - stage_start
+    existence_rate = exist_count / current_total
+    if tier_counts.get(MATCH_NORMALIZED) or tier_counts.get(MATCH_KIND_CODE):
+        log.append((logging.INFO, "容错匹配 | 精确: %d | 规范化: %d | 去类型代码: %d",
+                    (tier_counts.get(MATCH_EXACT, 0), tier_counts.get(MATCH_NORMALIZED, 0),
+                     tier_counts.get(MATCH_KIND_CODE, 0))))
+
+    # 记录缺失率高的文件
+    if existence_rate < 0.6:
+        log.append((logging.WARNING, "低专利存在率: %.2f%%", (existence_rate * 100,)))
+        if missing_numbers:
+            log.append((logging.DEBUG, "前3个缺失专利号: %s", (", ".join(missing_numbers[:3]),)))
+
+    # 读取下一个文件的前20%
+    log.append((logging.DEBUG, "交叉验证来源: %s (前%.0f%%)", (next_file, check_gap * 100)))
+
+    valid_count = 0
+    match_count = 0
+    mismatches = []
+    conflicting_names = []
+    try:
+        stage_start = time.perf_counter()
+        heads = parsed["heads"] if parsed is not None else {}
+        if next_file in heads:
+            next_total, next_chunk = heads[next_file]
+        elif prefetch_next:
+            # 下一个文件稍后还要作为当前文件处理，完整解析一次并缓存
+            next_total, next_columns = parsed["tables"][next_file] = read_csv_columns(next_file)
+            next_chunk = head_columns(next_columns, overlap_size(next_total, check_gap))
+            metrics["bytes_read"] += os.path.getsize(next_file)
+            metrics["rows_parsed"] += next_total
+        else:
+            # 仅作为重叠来源，只解析开头部分
+            next_total, next_chunk = read_csv_head_columns(next_file, check_gap)
+            metrics["bytes_read"] += os.path.getsize(next_file)
+            metrics["rows_parsed"] += overlap_size(next_total, check_gap)
+        metrics["parse_seconds"] += time.perf_counter() - stage_start
+
+        if not next_total:
+            log.append((logging.WARNING, "交叉验证文件为空: %s", (next_file,)))
+            consistency_rate = 0
+        else:
+            # 交叉验证
+            stage_start = time.perf_counter()
+            # 名称列与取值列在解析时已按列取出，连接直接在列上进行
+            joined = overlap_join(current_columns, next_chunk, duplicates)
+            valid_count, match_count = joined["valid_count"], joined["match_count"]
+            mismatches, conflicting_names = joined["mismatches"], joined["conflicting_names"]
+            metrics["cross_validate_seconds"] = time.perf_counter() - stage_start
+
+            if conflicting_names:
+                log.append((logging.WARNING, "重叠部分有 %d 个重复名称取值不一致(按 %s 处理): %s",
+                            (len(conflicting_names), duplicates, ", ".join(map(str, conflicting_names[:3])))))
+
+            if match_count:
+                consistency_rate = valid_count / match_count
+
+                # 记录低一致性文件
+                if consistency_rate < 0.9:
+                    log.append((logging.WARNING, "交叉验证一致率低: %.2f%%", (consistency_rate * 100,)))
+                    if mismatches:
+                        log.append((logging.DEBUG, "不一致的名称: %s",
+                                    (", ".join(str(row["name"]) for row in mismatches[:2]),)))
+            else:
+                consistency_rate = 0
+                log.append((logging.WARNING, "无匹配记录进行交叉验证", ()))
+
+    except FileNotFoundError:
+        log.append((logging.ERROR, "交叉验证文件不存在: %s", (next_file,)))
+        consistency_rate = 0
+    except KeyError as e:
+        log.append((logging.ERROR, "CSV缺少关键字段: %s in %s", (str(e), next_file)))
+        consistency_rate = 0
+    except Exception:
+        log.append(_exception_record("处理交叉验证文件失败: %s", next_file))
+        consistency_rate = 0
+
+    # 文件耗时统计
+    file_time = time.time() - file_start
+    metrics["total_seconds"] = file_time
+    log.append((logging.INFO, "文件统计 | 专利存在率: %.2f%% | 交叉验证一致率: %.2f%% | 耗时: %.2f秒",
+                (existence_rate * 100, consistency_rate * 100, file_time)))
+
+    result.update({
+        "processed": True,
+        "rows": current_total,
+        "exist_count": exist_count,
+        "missing_numbers": missing_numbers,
+        "match_count": match_count,
+        "valid_count": valid_count,
+        "mismatch_names": [row["name"] for row in mismatches],
+        "mismatches": mismatches,
+        "conflicting_names": conflicting_names,
+        "existence_rate": existence_rate,
+        "consistency_rate": consistency_rate,
+        "elapsed": file_time,
+        "match_tiers": tier_counts,
+    })
+    return result
+
+
+# validate_files 返回的逐文件计数
+FILE_COUNT_FIELDS = ("file", "next_file", "processed", "rows", "exist_count", "match_count", "valid_count",
+                     "existence_rate", "consistency_rate")
+
+
+def _set_auth_dict(value):
+    """保留模块级 auth_dict，供按旧方式访问"""
+    global auth_dict
+    auth_dict = value
+
+
+def _worker_initargs(auth_dict):
+    """工作进程初始化参数：磁盘索引传路径，由工作进程mmap打开；内存中的紧凑集合直接传给工作进程，
+    fork启动时与主进程共享页面，spawn启动时随pickle传入，都不在每个进程中重新解析JSON"""
+    tolerant = isinstance(auth_dict, PublicationNumberIndex)
+    exact = auth_dict.exact if tolerant else auth_dict
+    auth_index_path = exact.index_path if isinstance(exact, AuthIndex) else None
+    loaded = exact if isinstance(exact, CompactKeySet) else None
+    if tolerant and all(isinstance(index, CompactKeySet)
+                        for index in (auth_dict.exact, auth_dict.normalized, auth_dict.kind_code)):
+        loaded = auth_dict
+    json_path = getattr(exact, "json_path", None)
+    if auth_index_path is None and loaded is None and json_path is None:
+        # 没有可供工作进程重新打开的来源（如 create_authorization_dict 返回的dict），直接传入集合本身
+        loaded = auth_dict
+    return auth_index_path, json_path, tolerant, loaded
+
+
+def _init_worker(auth_index_path, auth_json_path, tolerant=False, loaded=None):
+    """工作进程初始化：通过mmap打开同一个授权号索引，不在进程间复制键集合
+
+    loaded为主进程中已加载的紧凑集合（或三级均为紧凑集合的容错索引）、或没有来源路径的映射时直接使用；
+    既没有索引也没有已加载的集合时流式加载授权公告号
+    """
+    global auth_dict
+    if isinstance(loaded, PublicationNumberIndex):
+        auth_dict = loaded
+        return
+    if auth_index_path:
+        auth_dict = AuthIndex(auth_index_path, auth_json_path)
+    elif loaded is not None:
+        auth_dict = loaded
+    else:
+        auth_dict = load_authorization_keys(auth_json_path)
+    if tolerant:
+        auth_dict = open_publication_number_index(auth_json_path, auth_dict)
+
+
+def _check_file_in_worker(task):
+    *args, duplicates = task
+    return _check_file(*args, auth_dict=auth_dict, duplicates=duplicates)
+
+
+def _iter_file_results(csv_files, check_gap, workers, indices, auth_dict, duplicates=DUPLICATES_LAST):
+    """按文件顺序产出 indices 中各文件的验证结果；workers大于1时在进程池中并行验证"""
+    # 生成环形文件列表用于处理最后一个文件
+    circular_files = csv_files + [csv_files[0]]
+    tasks = [(i, len(csv_files), csv_files[i], circular_files[i + 1], check_gap) for i in indices]
+
+    if workers and workers > 1 and len(tasks) > 1:
+        from concurrent.futures import ProcessPoolExecutor  # 只在并行验证时导入（含multiprocessing，导入较慢）
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)),
+                                 initializer=_init_worker,
+                                 initargs=_worker_initargs(auth_dict)) as executor:
+            # map 保持提交顺序，日志与汇总结果与单进程一致
+            yield from executor.map(_check_file_in_worker, [task + (duplicates,) for task in tasks])
+        return
+
+    # 每个文件只解析一次：下一个文件在交叉验证时完整解析并留给下一轮使用，
+    # 第一个文件的开头部分留给环形末尾使用
+    parsed = {"tables": {}, "heads": {}}
+    pending = set(indices)
+    for task in tasks:
+        yield _check_file(*task, auth_dict=auth_dict, parsed=parsed,
+                          prefetch_next=task[0] + 1 < len(csv_files) and task[0] + 1 in pending,
+                          duplicates=duplicates)
+
+
+def _cached_file_log(index, total_files, result, source="结果缓存命中"):
+    """缓存命中或从运行日志恢复时输出与重新验证相同的摘要日志"""
+    log = [(logging.INFO, "处理文件 [%d/%d]: %s (%s)", (index + 1, total_files, result["file"], source))]
+    if not result["processed"]:
+        return log
+    if result["existence_rate"] < 0.6:
+        log.append((logging.WARNING, "低专利存在率: %.2f%%", (result["existence_rate"] * 100,)))
+    if result["conflicting_names"]:
+        log.append((logging.WARNING, "重叠部分有 %d 个重复名称取值不一致", (len(result["conflicting_names"]),)))
+    if result["match_count"] and result["consistency_rate"] < 0.9:
+        log.append((logging.WARNING, "交叉验证一致率低: %.2f%%", (result["consistency_rate"] * 100,)))
+    log.append((logging.INFO, "文件统计 | 专利存在率: %.2f%% | 交叉验证一致率: %.2f%% | 耗时: %.2f秒",
+                (result["existence_rate"] * 100, result["consistency_rate"] * 100, 0.0)))
+    return log
+
+
+def validate_files(csv_files, check_gap=0.2, auth_dict_path="patent-checker-main/data/raw/专利申请人.json",
+                   workers=None, cache_path=None, metrics_path=None, auth_dict=None, tolerant=False,
+                   duplicates=DUPLICATES_LAST, journal_path=None, resume=False):
+    """执行专利数据验证工作流
+
+    workers大于1时使用多进程并行验证各文件，各进程通过mmap共享授权号索引；
+    指定cache_path时按文件内容指纹缓存逐文件结果，重新验证时只处理内容变化的文件及其前一个文件；
+    结果中的 "metrics" 为逐文件、逐阶段的读取量与耗时，指定metrics_path时另写为JSON Lines或Prometheus(.prom)文件；
+    auth_dict为已加载的授权号数据（如常驻服务中），提供时不再从auth_dict_path加载；
+    tolerant为True时容忍空格、大小写、全角字符与类型代码差异，逐文件结果的 "match_tiers" 记录各层级命中数；
+    duplicates为重叠部分重复名称的取值策略（last / first / skip），结果中的 "mismatches" 为全部文件的交叉验证不一致明细，
+    "files" 为按文件顺序的逐文件计数（行数、存在数、匹配数、一致数与比率）；
+    指定journal_path时每个文件完成后立即把结果追加到运行日志，resume为True时跳过日志中已完成且未变化的文件
+    """
+    if duplicates not in DUPLICATE_POLICIES:
+        raise ValueError(f"未知的重复名称策略: {duplicates}")
+
     logging.info("=" * 70)
     logging.info("开始专利数据验证流程")
     logging.info("文件数量: %d | 验证重叠率: %.0f%%",
@@ -89,11 +527,16 @@ def validate_files(csv_files, check_gap=0.2, auth_dict_path="patent-checker-main
     total_consistency_rate = 0.0
 
     # 加载授权字典
-    global auth_dict
-    auth_dict = create_authorization_dict(auth_dict_path)
+    load_start = time.perf_counter()
+    if auth_dict is None:
+        auth_dict = load_authorization_index(auth_dict_path)
     if not auth_dict:
         logging.critical("无法继续: 专利申请人字典为空")
         return
+    if tolerant:
+        auth_dict = open_publication_number_index(getattr(auth_dict, "json_path", None) or auth_dict_path, auth_dict)
+    _set_auth_dict(auth_dict)
+    load_auth_seconds = time.perf_counter() - load_start
 
     # 检查文件路径
     missing_files = [f for f in csv_files if not os.path.exists(f)]
@@ -104,122 +547,96 @@ def validate_files(csv_files, check_gap=0.2, auth_dict_path="patent-checker-main
             logging.error("所有文件均不存在")
             return
 
-    # 生成环形文件列表用于处理最后一个文件
+    # 查询结果缓存
     circular_files = csv_files + [csv_files[0]]
+    result_cache = None
+    cache_keys = [None] * len(csv_files)
+    cached_results = {}
+    if cache_path:
+        auth_version = getattr(auth_dict, "version", None)
+        if auth_version is None:
+            logging.warning("授权号数据没有版本标识，不使用结果缓存")
+        else:
+            result_cache = ResultCache(cache_path)
+            for i, file_path in enumerate(csv_files):
+                cache_keys[i] = result_cache.key(file_path, circular_files[i + 1], check_gap, auth_version,
+                                                 duplicates)
+                cached = result_cache.get(cache_keys[i])
+                if cached is not None:
+                    cached_results[i] = dict(cached, file=file_path, next_file=circular_files[i + 1])
+            logging.info("结果缓存命中: %d/%d", len(cached_results), len(csv_files))
+
+    # 从运行日志恢复已完成的文件
+    journal = None
+    resumed_results = {}
+    if journal_path:
+        journal = RunJournal(journal_path, {"files": list(csv_files), "check_gap": check_gap,
+                                            "auth_version": getattr(auth_dict, "version", None),
+                                            "duplicates": duplicates})
+        if resume:
+            resumed_results = journal.resume()
+            logging.info("从运行日志恢复: %d/%d 个文件已完成", len(resumed_results), len(csv_files))
+        else:
+            journal.start()
+
+    pending = [i for i in range(len(csv_files)) if i not in cached_results and i not in resumed_results]
+    computed_results = _iter_file_results(csv_files, check_gap, workers, pending, auth_dict, duplicates)
 
     # 处理每个文件
     processed_files = 0
-    for i, file_path in enumerate(csv_files):
-        file_start = time.time()
-        logging.info("处理文件 [%d/%d]: %s", i + 1, len(csv_files), file_path)
-
-        # 读取当前文件
-        try:
-            with open(file_path, 'r', encoding='utf-8-sig') as f:
-                reader = csv.DictReader(f)
-                current_rows = list(reader)
-                logging.debug("读取到 %d 条记录", len(current_rows))
-
-        except UnicodeDecodeError:
-            logging.exception("文件编码问题: %s", file_path)
-            continue
-        except Exception as e:
-            logging.exception("读取文件失败: %s", file_path)
-            continue
-
-        if not current_rows:
-            logging.warning("文件为空: %s", file_path)
-            continue
-
-        # 验证存在率
-        exist_count = 0
-        missing_numbers = []
-
-        for row_idx, row in enumerate(current_rows, 1):
-            pub_num = row.get("patent_publication_number")
-            if not pub_num:
-                logging.debug("第 %d 行缺少专利号", row_idx)
-                continue
-
-            if pub_num in auth_dict:
-                exist_count += 1
-            else:
-                missing_numbers.append(pub_num)
-
-        existence_rate = exist_count / len(current_rows)
-        total_existence_rate += existence_rate
-
-        # 记录缺失率高的文件
-        if existence_rate < 0.6:
-            logging.warning("低专利存在率: %.2f%%", existence_rate * 100)
-            if missing_numbers:
-                logging.debug("前3个缺失专利号: %s", ", ".join(missing_numbers[:3]))
-
-        # 读取下一个文件的前20%
-        next_file = circular_files[i + 1]
-        logging.debug("交叉验证来源: %s (前%.0f%%)", next_file, check_gap * 100)
-
-        try:
-            with open(next_file, 'r', encoding='utf-8-sig') as f:
-                reader = csv.DictReader(f)
-                next_rows = list(reader)
-
-            if not next_rows:
-                logging.warning("交叉验证文件为空: %s", next_file)
-                consistency_rate = 0
+    file_metrics = []
+    file_counts = []
+    mismatches = []
+    # 运行日志在出错时也要关闭，已写入的记录留给下次 resume
+    try:
+        for i in range(len(csv_files)):
+            if i in resumed_results or i in cached_results:
+                resumed = i in resumed_results
+                result = resumed_results[i] if resumed else cached_results[i]
+                log = _cached_file_log(i, len(csv_files), result, "运行日志恢复" if resumed else "结果缓存命中")
+                metrics = {"worker": os.getpid(), "cache_hit": not resumed, "bytes_read": 0, "rows_parsed": 0,
+                           "parse_seconds": 0.0, "lookup_seconds": 0.0, "cross_validate_seconds": 0.0,
+                           "total_seconds": 0.0}
             else:
-                chunk_size = math.ceil(len(next_rows) * check_gap)
-                next_chunk = next_rows[:chunk_size]
-                name_mapping = {row["name"]: row["have_patent_fixed"] for row in next_chunk}
-
-                # 交叉验证
-                valid_count = 0
-                match_count = 0
-                mismatch_names = []
-
-                for row in current_rows:
-                    if row["name"] in name_mapping:
-                        match_count += 1
-                        if row["have_patent_fixed"] == name_mapping[row["name"]]:
-                            valid_count += 1
-                        elif valid_count == 0:  # 只记录前2个不匹配
-                            mismatch_names.append(row["name"])
-
-                if match_count:
-                    consistency_rate = valid_count / match_count
-                    total_consistency_rate += consistency_rate
-
-                    # 记录低一致性文件
-                    if consistency_rate < 0.9:
-                        logging.warning("交叉验证一致率低: %.2f%%", consistency_rate * 100)
-                        if mismatch_names:
-                            logging.debug("不一致的名称: %s", ", ".join(mismatch_names[:2]))
-                else:
-                    consistency_rate = 0
-                    logging.warning("无匹配记录进行交叉验证")
-
-        except FileNotFoundError:
-            logging.error("交叉验证文件不存在: %s", next_file)
-            consistency_rate = 0
-        except KeyError as e:
-            logging.error("CSV缺少关键字段: %s in %s", str(e), next_file)
-            consistency_rate = 0
-        except Exception as e:
-            logging.exception("处理交叉验证文件失败: %s", next_file)
-            consistency_rate = 0
-
-        # 文件耗时统计
-        file_time = time.time() - file_start
-        logging.info("文件统计 | 专利存在率: %.2f%% | 交叉验证一致率: %.2f%% | 耗时: %.2f秒",
-                     existence_rate * 100, consistency_rate * 100, file_time)
-        processed_files += 1
+                result = next(computed_results)
+                log = result.pop("log")
+                metrics = result.pop("metrics")
+                if result_cache is not None:
+                    result_cache.put(cache_keys[i], result)
+            if journal is not None and i not in resumed_results:
+                journal.append(i, result)
+            file_metrics.append(dict(metrics, file=result["file"], index=i))
+            for level, msg, args in log:
+                logging.log(level, msg, *args)
+            file_counts.append({name: result.get(name, 0) for name in FILE_COUNT_FIELDS})
+            if not result["processed"]:
+                continue
+            mismatches.extend(dict(row, file=result["file"], next_file=result["next_file"])
+                              for row in result["mismatches"])
+            total_existence_rate += result["existence_rate"]
+            total_consistency_rate += result["consistency_rate"]
+            processed_files += 1
+    finally:
+        computed_results.close()
+        if journal is not None:
+            journal.close()
+
+    if result_cache is not None:
+        result_cache.save()
+
+    total_time = time.time() - start_time
+    run_metrics = {"files": len(csv_files), "processed_files": processed_files, "cache_hits": len(cached_results),
+                   "resumed_files": len(resumed_results), "workers": workers or 1,
+                   "load_auth_seconds": load_auth_seconds, "total_seconds": total_time}
+    metrics = {"run": run_metrics, "files": file_metrics}
+    if metrics_path:
+        write_metrics(metrics, metrics_path)
 
     # 输出平均值
     if processed_files:
         avg_existence = total_existence_rate / processed_files
         avg_consistency = total_consistency_rate / processed_files
 
-        total_time = time.time() - start_time
         logging.info("=" * 70)
         logging.info("验证完成 | 文件数: %d | 总耗时: %.2f秒", processed_files, total_time)
         logging.info("平均统计:")
@@ -228,7 +645,10 @@ def validate_files(csv_files, check_gap=0.2, auth_dict_path="patent-checker-main
         logging.info("=" * 70)
 
         return {"avg_existence_rate": avg_existence,
-                "avg_consistency_rate": avg_consistency}
+                "avg_consistency_rate": avg_consistency,
+                "files": file_counts,
+                "mismatches": mismatches,
+                "metrics": metrics}
     else:
         logging.error("未成功处理任何文件")
         return None
@@ -236,13 +656,21 @@ def validate_files(csv_files, check_gap=0.2, auth_dict_path="patent-checker-main
 
 # 使用示例
 if __name__ == "__main__":
+    # 初始化日志系统
+    setup_logging()
+
     # 文件列表
     csv_files = [
         "patent-checker-main/data/匹配失败起草单位v4_无专利数据_split/1组邓玉杰最终版.csv",
     ]
 
-    # 执行验证
-    results = validate_files(csv_files)
+    # 执行验证；设置了 PATENT_CHECKER_DAEMON 时交由常驻服务执行，省去加载授权号数据
+    daemon_url = os.environ.get("PATENT_CHECKER_DAEMON")
+    if daemon_url:
+        from patent_checker.daemon import validate
+        results = validate(csv_files, daemon_url)
+    else:
+        results = validate_files(csv_files)
 
     if results:
         logging.info("验证成功完成 | 平均专利存在率: %.2f%% | 平均交叉验证一致率: %.2f%%",
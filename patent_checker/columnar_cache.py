@@ -0,0 +1,128 @@
+"""列式缓存：为CSV生成只含所需列的Arrow旁路文件（内存映射读取），源文件大小或修改时间变化时自动重建
+
+需要安装 pyarrow，并设置环境变量 PATENT_CHECKER_COLUMNAR_CACHE=1 启用；未启用时各工具照常解析CSV。
+"""
+import csv
+import logging
+import os
+
+LOGGER = logging.getLogger(__name__)
+
+pa = None  # pyarrow，启用列式缓存时才导入
+
+CACHE_ENV = "PATENT_CHECKER_COLUMNAR_CACHE"
+CACHE_VERSION = b'1'
+
+# checker、single_checker 用到的列
+COLUMNS = ['name', 'have_patent_fixed', 'patent_publication_number', 'now_name', 'patent_fixed']
+
+# pandas.read_csv 默认识别为缺失值的字符串
+READ_CSV_NA_VALUES = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+}
+
+
+def _import_pyarrow():
+    global pa
+    if pa is None:
+        try:
+            import pyarrow
+        except ImportError:  # 可选依赖
+            return None
+        pa = pyarrow
+    return pa
+
+
+def is_enabled():
+    """设置了环境变量且pyarrow可用时启用"""
+    return os.environ.get(CACHE_ENV, '') not in ('', '0') and _import_pyarrow() is not None
+
+
+def sidecar_path(csv_path):
+    return f'{csv_path}.arrow'
+
+
+def build_sidecar(csv_path):
+    """按 csv.DictReader 的语义解析一次CSV，只保留所需列写为Arrow IPC文件"""
+    stat = os.stat(csv_path)
+    with open(csv_path, 'r', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        # 表头重复时与 DictReader 一样取最后一列
+        positions = {column: position for position, column in enumerate(header) if column in COLUMNS}
+        values = {column: [] for column in positions}
+        for row in reader:
+            if not row:  # DictReader 跳过空行
+                continue
+            for column, position in positions.items():
+                # DictReader 对缺少的字段填 None
+                values[column].append(row[position] if position < len(row) else None)
+
+    metadata = {
+        b'version': CACHE_VERSION,
+        b'source_size': str(stat.st_size).encode(),
+        b'source_mtime_ns': str(stat.st_mtime_ns).encode(),
+    }
+    table = pa.table({column: pa.array(values[column], type=pa.string()) for column in positions},
+                     metadata=metadata)
+
+    path = sidecar_path(csv_path)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    LOGGER.debug("已生成列式缓存: %s", path)
+
+
+def _open_sidecar(csv_path):
+    path = sidecar_path(csv_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    except (OSError, pa.ArrowInvalid):
+        return None
+    metadata = table.schema.metadata or {}
+    stat = os.stat(csv_path)
+    if (metadata.get(b'version') != CACHE_VERSION
+            or metadata.get(b'source_size') != str(stat.st_size).encode()
+            or metadata.get(b'source_mtime_ns') != str(stat.st_mtime_ns).encode()):
+        return None
+    return table
+
+
+def load_table(csv_path):
+    """返回CSV对应的Arrow表（内存映射），未启用列式缓存或旁路文件无法生成时返回None，由调用方照常解析CSV"""
+    if not is_enabled():
+        return None
+    table = _open_sidecar(csv_path)
+    if table is None:
+        try:
+            build_sidecar(csv_path)
+        except OSError as e:
+            LOGGER.warning("无法生成列式缓存，改为直接解析CSV: %s (%s)", csv_path, e)
+            return None
+        table = _open_sidecar(csv_path)
+    return table
+
+
+def to_dataframe(table):
+    """转为与 pandas.read_csv 相近的DataFrame：缺失值字符串转为NaN，整列可解析为数值时转为数值"""
+    import pandas as pd
+
+    frame = table.to_pandas()
+    for column in frame.columns:
+        series = frame[column].astype(object)
+        series = series.where(~series.isin(READ_CSV_NA_VALUES) & series.notna())
+        try:
+            series = pd.to_numeric(series)
+        except (ValueError, TypeError):
+            pass
+        frame[column] = series
+    return frame
@@ -0,0 +1,160 @@
+"""交叉验证引擎：按名称将当前文件与下一个文件开头部分（重叠部分）做列式哈希连接，输出完整的不一致明细
+
+输入可以是行字典列表（csv.DictReader 的结果），也可以是按列存储的表（DataFrame、列名 -> 序列的dict）。
+两边的名称列与取值列都是Arrow数组（列式缓存读出的列）时，当前文件一侧的查找与比较在Arrow中完成，不为每行创建Python对象。
+numpy、pandas与pyarrow在首次连接时才导入，导入本模块（及checker）不加载它们。
+"""
+import sys
+from operator import itemgetter
+
+NAME_FIELD = "name"
+VALUE_FIELD = "have_patent_fixed"
+
+# 重叠部分出现重复名称时采用的取值
+DUPLICATES_LAST = "last"  # 以最后一次出现为准（与旧版逐行比对一致）
+DUPLICATES_FIRST = "first"  # 以第一次出现为准
+DUPLICATES_SKIP = "skip"  # 取值冲突的名称不参与比对
+DUPLICATE_POLICIES = (DUPLICATES_LAST, DUPLICATES_FIRST, DUPLICATES_SKIP)
+
+
+def _columns(table):
+    """取出名称列与取值列，均为object数组；缺少字段时抛出KeyError"""
+    import numpy as np
+    if isinstance(table, list):
+        return (np.fromiter(map(itemgetter(NAME_FIELD), table), dtype=object, count=len(table)),
+                np.fromiter(map(itemgetter(VALUE_FIELD), table), dtype=object, count=len(table)))
+    return np.asarray(table[NAME_FIELD], dtype=object), np.asarray(table[VALUE_FIELD], dtype=object)
+
+
+def _hash_codes(names):
+    """Python字符串哈希（已缓存在字符串对象上）转为int64，连接在整数上进行"""
+    import numpy as np
+    return np.fromiter(map(hash, names), dtype=np.int64, count=len(names))
+
+
+def _encode(overlap_names, current_names):
+    """把两边的名称编码为整数，相同名称编码相同
+
+    优先使用字符串哈希；重叠部分内出现哈希相同但名称不同时（极少见）改用精确的factorize。
+    当前文件一侧哈希碰撞的名称由 _lookup 核对字符串后剔除。
+    """
+    import numpy as np
+    import pandas as pd
+    overlap_codes = _hash_codes(overlap_names)
+    index = pd.Index(overlap_codes)
+    if index.is_unique:
+        return overlap_codes, _hash_codes(current_names), True
+    repeated = index.duplicated(keep=False)
+    names_per_code = pd.Series(overlap_names[repeated]).groupby(overlap_codes[repeated]).nunique(dropna=False)
+    if (names_per_code <= 1).all():
+        return overlap_codes, _hash_codes(current_names), True
+    codes, _ = pd.factorize(np.concatenate([overlap_names, current_names]), use_na_sentinel=False)
+    return codes[:len(overlap_names)], codes[len(overlap_names):], False
+
+
+def _resolve_overlap(codes, names, values, duplicates):
+    """按重复名称策略得到重叠部分每个名称采用的行位置，以及取值冲突的名称（按首次出现顺序）"""
+    import numpy as np
+    import pandas as pd
+    index = pd.Index(codes)
+    selected = ~index.duplicated(keep=DUPLICATES_FIRST if duplicates == DUPLICATES_FIRST else DUPLICATES_LAST)
+    conflicting = []
+    if not selected.all():
+        repeated = index.duplicated(keep=False)
+        values_per_code = pd.Series(values[repeated]).groupby(codes[repeated], sort=False).nunique(dropna=False)
+        conflicting_codes = values_per_code.index[values_per_code > 1].to_numpy()
+        if len(conflicting_codes):
+            first = ~index.duplicated(keep=DUPLICATES_FIRST)
+            conflicting = names[first & np.isin(codes, conflicting_codes)].tolist()
+            if duplicates == DUPLICATES_SKIP:
+                selected &= ~np.isin(codes, conflicting_codes)
+    return np.flatnonzero(selected), conflicting
+
+
+def _lookup(overlap_codes, overlap_names, positions, current_codes, current_names, verify):
+    """返回当前文件每一行在重叠部分中对应的行位置，不存在为-1"""
+    import numpy as np
+    import pandas as pd
+    found = pd.Index(overlap_codes[positions]).get_indexer(current_codes)
+    matched = np.flatnonzero(found >= 0)
+    found[matched] = positions[found[matched]]
+    if verify:
+        # 哈希相同但名称不同的当前行不在重叠部分中
+        collided = matched[(current_names[matched] != overlap_names[found[matched]]).astype(bool)]
+        found[collided] = -1
+    return found
+
+
+def _is_arrow(table):
+    # pyarrow是可选依赖且导入较慢：尚未导入时输入不可能是Arrow数组
+    pa = sys.modules.get("pyarrow")
+    return (pa is not None and not isinstance(table, list)
+            and isinstance(table[NAME_FIELD], (pa.Array, pa.ChunkedArray))
+            and isinstance(table[VALUE_FIELD], (pa.Array, pa.ChunkedArray)))
+
+
+def _arrow_overlap_join(current, overlap, duplicates):
+    """Arrow列上的连接：重叠部分（较小的一侧）按重复名称策略去重后，当前文件的名称用 index_in 在Arrow中查找"""
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    if len(pc.unique(overlap[NAME_FIELD])) == len(overlap[NAME_FIELD]):
+        positions, conflicting = np.arange(len(overlap[NAME_FIELD])), []
+    else:
+        overlap_names, overlap_values = _columns({NAME_FIELD: overlap[NAME_FIELD].to_pylist(),
+                                                  VALUE_FIELD: overlap[VALUE_FIELD].to_pylist()})
+        overlap_codes, _, _ = _encode(overlap_names, overlap_names[:0])
+        positions, conflicting = _resolve_overlap(overlap_codes, overlap_names, overlap_values, duplicates)
+
+    value_set = overlap[NAME_FIELD].take(positions)
+    if isinstance(value_set, pa.ChunkedArray):
+        value_set = value_set.combine_chunks()
+    found = pc.fill_null(pc.index_in(current[NAME_FIELD], value_set=value_set), -1).to_numpy()
+    matched = np.flatnonzero(found >= 0)
+    current_values = current[VALUE_FIELD].take(matched)
+    next_values = overlap[VALUE_FIELD].take(positions[found[matched]])
+    # 与Python的 == 一致：两边都缺失（None）视为相同
+    equal = pc.or_(pc.fill_null(pc.equal(current_values, next_values), False),
+                   pc.and_(pc.is_null(current_values), pc.is_null(next_values)))
+    equal = equal.to_numpy(zero_copy_only=False).astype(bool)
+    mismatched = matched[~equal]
+
+    mismatches = [{"row": row + 1, "name": name, "current": current_value, "next": next_value}
+                  for row, name, current_value, next_value in zip(
+                      mismatched.tolist(), current[NAME_FIELD].take(mismatched).to_pylist(),
+                      current_values.filter(~equal).to_pylist(), next_values.filter(~equal).to_pylist())]
+    return {"valid_count": int(equal.sum()), "match_count": len(matched),
+            "mismatches": mismatches, "conflicting_names": conflicting}
+
+
+def overlap_join(current, overlap, duplicates=DUPLICATES_LAST):
+    """按名称比对当前文件与重叠部分的 have_patent_fixed
+
+    返回dict：valid_count 一致数，match_count 匹配数，
+    mismatches 为全部不一致记录（row 为当前文件中从1开始的数据行号，current/next 为两边的取值），
+    conflicting_names 为重叠部分中重复出现且取值不同的名称。
+    """
+    import numpy as np
+    if duplicates not in DUPLICATE_POLICIES:
+        raise ValueError(f"未知的重复名称策略: {duplicates}")
+    if _is_arrow(current) and _is_arrow(overlap):
+        return _arrow_overlap_join(current, overlap, duplicates)
+
+    current_names, current_values = _columns(current)
+    overlap_names, overlap_values = _columns(overlap)
+    overlap_codes, current_codes, verify = _encode(overlap_names, current_names)
+    positions, conflicting = _resolve_overlap(overlap_codes, overlap_names, overlap_values, duplicates)
+
+    found = _lookup(overlap_codes, overlap_names, positions, current_codes, current_names, verify)
+    matched = np.flatnonzero(found >= 0)
+    next_values = overlap_values[found[matched]]
+    equal = (current_values[matched] == next_values).astype(bool)
+    mismatched = matched[~equal]
+
+    mismatches = [{"row": row + 1, "name": name, "current": current_value, "next": next_value}
+                  for row, name, current_value, next_value in zip(mismatched.tolist(),
+                                                                  current_names[mismatched].tolist(),
+                                                                  current_values[mismatched].tolist(),
+                                                                  next_values[~equal].tolist())]
+    return {"valid_count": int(equal.sum()), "match_count": len(matched),
+            "mismatches": mismatches, "conflicting_names": conflicting}
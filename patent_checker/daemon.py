@@ -0,0 +1,158 @@
+"""常驻检查服务：启动时加载一次授权号索引，通过本机HTTP接受质检、验证与批量查询请求，专利申请人JSON变化时自动重新加载
+
+服务端: python -m patent_checker.daemon
+客户端: 设置环境变量 PATENT_CHECKER_DAEMON=http://127.0.0.1:8765 后运行 checker / single_checker
+"""
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import checker, single_checker
+from .auth_index import open_auth_index
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DAEMON_ENV = "PATENT_CHECKER_DAEMON"
+
+
+class AuthStore:
+    """持有当前的授权号索引，源JSON的大小或修改时间变化时在下一次请求前重新加载"""
+
+    def __init__(self, json_path):
+        self.json_path = json_path
+        self._lock = threading.Lock()
+        self._signature = None
+        self._auth_dict = None
+        self.loaded_at = None
+        self.get()
+
+    def _current_signature(self):
+        stat = os.stat(self.json_path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def get(self):
+        """返回最新的授权号索引"""
+        signature = self._current_signature()
+        if signature != self._signature:
+            with self._lock:
+                if signature != self._signature:
+                    start_time = time.perf_counter()
+                    self._auth_dict = open_auth_index(self.json_path)
+                    self._signature = signature
+                    self.loaded_at = time.time()
+                    LOGGER.info("授权号索引已加载 | 记录数: %d | 耗时: %.3f秒",
+                                len(self._auth_dict), time.perf_counter() - start_time)
+        return self._auth_dict
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    server_version = "PatentCheckerDaemon/1"
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/status":
+            self._send_json(404, {"error": f"未知路径: {self.path}"})
+            return
+        store = self.server.auth_store
+        auth_dict = store.get()
+        self._send_json(200, {"json_path": store.json_path, "records": len(auth_dict),
+                              "version": getattr(auth_dict, "version", None), "loaded_at": store.loaded_at})
+
+    def do_POST(self):
+        handlers = {"/lookup": self._lookup, "/check": self._check, "/validate": self._validate}
+        handler = handlers.get(self.path)
+        if handler is None:
+            self._send_json(404, {"error": f"未知路径: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            self._send_json(200, handler(payload, self.server.auth_store.get()))
+        except (KeyError, TypeError, ValueError) as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            LOGGER.exception("处理请求失败: %s", self.path)
+            self._send_json(500, {"error": str(e)})
+
+    @staticmethod
+    def _lookup(payload, auth_dict):
+        numbers = payload["numbers"]
+        return {"found": [number in auth_dict for number in numbers]}
+
+    @staticmethod
+    def _check(payload, auth_dict):
+        counts = single_checker.process_csv_file(payload["csv_file"], auth_dict=auth_dict)
+        return {"counts": list(counts)}
+
+    @staticmethod
+    def _validate(payload, auth_dict):
+        result = checker.validate_files(payload["csv_files"], payload.get("check_gap", 0.2),
+                                        workers=payload.get("workers"), cache_path=payload.get("cache_path"),
+                                        auth_dict=auth_dict)
+        return {"result": result}
+
+    def log_message(self, format, *args):
+        LOGGER.debug("%s - %s", self.address_string(), format % args)
+
+
+def create_server(json_path, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """创建多线程HTTP服务，port为0时由系统分配端口"""
+    server = ThreadingHTTPServer((host, port), _RequestHandler)
+    server.daemon_threads = True
+    server.auth_store = AuthStore(json_path)
+    return server
+
+
+def serve(json_path, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """启动常驻服务直到被中断"""
+    server = create_server(json_path, host, port)
+    LOGGER.info("检查服务已启动: http://%s:%d", *server.server_address[:2])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def _request(url, path, payload=None):
+    data = None if payload is None else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    request = urllib.request.Request(url.rstrip('/') + path, data=data,
+                                     headers={"Content-Type": "application/json; charset=utf-8"})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def lookup(numbers, url):
+    """批量查询授权公告号是否存在"""
+    return _request(url, "/lookup", {"numbers": list(numbers)})["found"]
+
+
+def check_csv(csv_file, url):
+    """由服务端执行 single_checker.process_csv_file，返回四个计数"""
+    return tuple(_request(url, "/check", {"csv_file": os.path.abspath(csv_file)})["counts"])
+
+
+def validate(csv_files, url, check_gap=0.2, workers=None, cache_path=None):
+    """由服务端执行 checker.validate_files"""
+    payload = {"csv_files": [os.path.abspath(path) for path in csv_files], "check_gap": check_gap,
+               "workers": workers, "cache_path": cache_path and os.path.abspath(cache_path)}
+    return _request(url, "/validate", payload)["result"]
+
+
+if __name__ == "__main__":
+    checker.setup_logging()
+    serve("data/专利申请人.json")
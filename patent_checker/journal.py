@@ -0,0 +1,109 @@
+"""验证运行日志：每个文件验证完成后立即追加一行结果（JSON Lines），运行中断后可从日志恢复，跳过已完成的文件"""
+import json
+import logging
+import os
+
+LOGGER = logging.getLogger(__name__)
+
+JOURNAL_VERSION = 1
+
+
+def _signature(file_path):
+    """文件大小与修改时间，恢复时据此判断已完成的结果是否仍然有效"""
+    stat = os.stat(file_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class RunJournal:
+    """单次验证运行的追加式日志
+
+    第一行记录运行参数，之后每行是一个文件的结果。每行通过一次写入追加并fsync，
+    进程在写入中途被终止时最多留下一行不完整的记录，恢复时忽略。
+    """
+
+    def __init__(self, journal_path, params):
+        self.journal_path = journal_path
+        self.params = dict(params, version=JOURNAL_VERSION)
+        self._file = None
+
+    def _read(self):
+        """返回日志中的运行参数与各文件记录；文件不存在或无法解析时返回 (None, [])"""
+        try:
+            with open(self.journal_path, 'rb') as file:
+                lines = file.read().split(b'\n')
+        except OSError:
+            return None, []
+        # 最后一段没有换行符，是未写完的记录（或空串）
+        records = []
+        for line in lines[:-1]:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                LOGGER.warning("运行日志中有无法解析的记录，已忽略: %s", self.journal_path)
+        if not records or records[0].get("type") != "run":
+            return None, []
+        return records[0].get("params"), records[1:]
+
+    def resume(self):
+        """读取已完成的文件结果 {文件序号: 结果}，并继续在日志末尾追加；参数不一致时重新开始"""
+        params, records = self._read()
+        if params != self.params:
+            if params is not None:
+                LOGGER.warning("运行参数与日志不一致，重新开始: %s", self.journal_path)
+            self.start()
+            return {}
+
+        files = self.params["files"]
+        circular_files = files + files[:1]
+        completed = {}
+        for record in records:
+            index = record.get("index")
+            if not isinstance(index, int) or not 0 <= index < len(files):
+                continue
+            try:
+                signatures = [_signature(files[index]), _signature(circular_files[index + 1])]
+            except OSError:
+                continue
+            # 未处理成功的结果（如内存不足）不算完成，恢复时重新验证
+            if record.get("signatures") == signatures and record["result"].get("processed"):
+                completed[index] = record["result"]
+
+        self._truncate_partial()
+        self._file = open(self.journal_path, 'ab', buffering=0)
+        return completed
+
+    def _truncate_partial(self):
+        """去掉末尾未写完的记录，保证后续追加从新的一行开始"""
+        with open(self.journal_path, 'rb+') as file:
+            data = file.read()
+            end = data.rfind(b'\n') + 1
+            if end < len(data):
+                file.truncate(end)
+
+    def start(self):
+        """清空日志并写入运行参数"""
+        self.close()
+        self._file = open(self.journal_path, 'wb', buffering=0)
+        self._write({"type": "run", "params": self.params})
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n')
+        os.fsync(self._file.fileno())
+
+    def append(self, index, result):
+        """追加一个文件的结果（不含日志与指标）；与结果缓存一样，未处理成功的结果不写入"""
+        if not result.get("processed"):
+            return
+        files = self.params["files"]
+        next_file = files[(index + 1) % len(files)]
+        self._write({
+            "type": "file",
+            "index": index,
+            "signatures": [_signature(files[index]), _signature(next_file)],
+            "result": {name: value for name, value in result.items() if name not in ("log", "metrics")},
+        })
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
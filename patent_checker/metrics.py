@@ -0,0 +1,63 @@
+"""验证指标输出：将 validate_files 收集的逐文件、逐阶段指标写为JSON Lines或Prometheus文本文件"""
+import json
+import os
+
+# 逐文件指标中按阶段输出的耗时字段
+STAGE_FIELDS = {
+    "parse": "parse_seconds",
+    "lookup": "lookup_seconds",
+    "cross_validate": "cross_validate_seconds",
+    "total": "total_seconds",
+}
+
+
+def write_jsonl(metrics, path):
+    """每行一条记录：先是整次运行的汇总，再按文件顺序输出逐文件指标"""
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(json.dumps(dict(metrics["run"], type="run"), ensure_ascii=False) + '\n')
+        for file_metrics in metrics["files"]:
+            file.write(json.dumps(dict(file_metrics, type="file"), ensure_ascii=False) + '\n')
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def write_prometheus(metrics, path):
+    """node_exporter textfile 格式，先写临时文件再替换，避免被读到一半"""
+    run = metrics["run"]
+    lines = [
+        "# TYPE patent_validation_run_seconds gauge",
+        f'patent_validation_run_seconds{{stage="load_auth"}} {run["load_auth_seconds"]}',
+        f'patent_validation_run_seconds{{stage="total"}} {run["total_seconds"]}',
+        "# TYPE patent_validation_files gauge",
+        f'patent_validation_files{{state="total"}} {run["files"]}',
+        f'patent_validation_files{{state="processed"}} {run["processed_files"]}',
+        f'patent_validation_files{{state="cache_hit"}} {run["cache_hits"]}',
+        "# TYPE patent_validation_file_seconds gauge",
+    ]
+    for file_metrics in metrics["files"]:
+        for stage, field in STAGE_FIELDS.items():
+            lines.append(f'patent_validation_file_seconds{{file="{_label(file_metrics["file"])}",'
+                         f'stage="{stage}"}} {file_metrics[field]}')
+    lines.append("# TYPE patent_validation_file_bytes_read gauge")
+    for file_metrics in metrics["files"]:
+        lines.append(f'patent_validation_file_bytes_read{{file="{_label(file_metrics["file"])}"}} '
+                     f'{file_metrics["bytes_read"]}')
+    lines.append("# TYPE patent_validation_file_rows_parsed gauge")
+    for file_metrics in metrics["files"]:
+        lines.append(f'patent_validation_file_rows_parsed{{file="{_label(file_metrics["file"])}"}} '
+                     f'{file_metrics["rows_parsed"]}')
+
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        file.write('\n'.join(lines) + '\n')
+    os.replace(tmp_path, path)
+
+
+def write_metrics(metrics, path):
+    """按扩展名选择格式：.prom 为Prometheus文本文件，其余为JSON Lines"""
+    if str(path).endswith('.prom'):
+        write_prometheus(metrics, path)
+    else:
+        write_jsonl(metrics, path)
@@ -0,0 +1,80 @@
+"""专利公开号规范化索引：容忍空格、大小写、全角字符以及缺失或不同的类型代码，按精确、规范化、去类型代码三级匹配"""
+import re
+import unicodedata
+
+from .auth_index import open_auth_index
+
+MATCH_EXACT = 'exact'
+MATCH_NORMALIZED = 'normalized'
+MATCH_KIND_CODE = 'kind_code'
+MATCH_TIERS = (MATCH_EXACT, MATCH_NORMALIZED, MATCH_KIND_CODE)
+
+# 末尾的类型代码，如 A、B、U、B1、A1
+_KIND_CODE = re.compile(r'^(.*\d)[A-Z]\d?$')
+
+
+def normalize_publication_number(value):
+    """全角转半角、去除所有空白并转为大写"""
+    if not isinstance(value, str):
+        return ''
+    return ''.join(unicodedata.normalize('NFKC', value).split()).upper()
+
+
+def strip_kind_code(value):
+    """规范化并去掉末尾的类型代码，CN1234567A 与 CN1234567B 得到相同结果"""
+    canonical = normalize_publication_number(value)
+    match = _KIND_CODE.match(canonical)
+    return match.group(1) if match else canonical
+
+
+class PublicationNumberIndex:
+    """三级授权公告号索引，三个层级都是预先编译的有序键数组，每次查询至多三次二分查找"""
+
+    def __init__(self, exact, normalized, kind_code):
+        self.exact = exact
+        self.normalized = normalized
+        self.kind_code = kind_code
+
+    @property
+    def version(self):
+        return f"{getattr(self.exact, 'version', None)}:tolerant"
+
+    @property
+    def json_path(self):
+        return getattr(self.exact, 'json_path', None)
+
+    def __len__(self):
+        return len(self.exact)
+
+    def match(self, value):
+        """返回命中的层级，未命中返回None"""
+        if value in self.exact:
+            return MATCH_EXACT
+        if normalize_publication_number(value) in self.normalized:
+            return MATCH_NORMALIZED
+        if strip_kind_code(value) in self.kind_code:
+            return MATCH_KIND_CODE
+        return None
+
+    def __contains__(self, value):
+        return self.match(value) is not None
+
+    def resolve(self, value):
+        """返回 (命中层级, 授权库中对应的完整记录)；非精确命中时从源JSON按需读取记录"""
+        tier = self.match(value)
+        if tier == MATCH_EXACT:
+            return tier, self.exact.get(value)
+        if tier == MATCH_NORMALIZED:
+            return tier, self.normalized.get(normalize_publication_number(value))
+        if tier == MATCH_KIND_CODE:
+            return tier, self.kind_code.get(strip_kind_code(value))
+        return None, None
+
+
+def open_publication_number_index(json_path, exact=None):
+    """打开（必要时编译）精确、规范化与去类型代码三个索引"""
+    return PublicationNumberIndex(
+        exact if exact is not None else open_auth_index(json_path),
+        open_auth_index(json_path, f'{json_path}.norm.idx', key_func=normalize_publication_number),
+        open_auth_index(json_path, f'{json_path}.kind.idx', key_func=strip_kind_code),
+    )
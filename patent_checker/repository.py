@@ -0,0 +1,220 @@
+"""标注工作流的数据仓储：数据记录、任务、任务-记录关系与标注员保存在本地SQLite文件中（见 docs/models.md）
+
+批量导入使用 executemany 并按批提交事务；record_id、task_id、assigner_id 上建有索引，
+按标注员统计未完成任务、按批次统计验收状态都只扫描任务级别的表。
+"""
+import csv
+import itertools
+import json
+import logging
+import sqlite3
+
+from .splitter import chunk_layout
+
+LOGGER = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS data_record (
+    id INTEGER PRIMARY KEY,
+    batch TEXT NOT NULL,
+    raw TEXT NOT NULL,
+    ann TEXT,
+    is_validated INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS data_task (
+    id INTEGER PRIMARY KEY,
+    batch TEXT NOT NULL,
+    file_path TEXT,
+    record_count INTEGER NOT NULL DEFAULT 0,
+    is_finished INTEGER NOT NULL DEFAULT 0,
+    is_validated INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS task_record_relation (
+    task_id INTEGER NOT NULL REFERENCES data_task(id),
+    position INTEGER NOT NULL,
+    record_id INTEGER NOT NULL REFERENCES data_record(id),
+    ann TEXT,
+    PRIMARY KEY (task_id, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS assigner (
+    id INTEGER PRIMARY KEY,
+    real_name TEXT,
+    username TEXT NOT NULL UNIQUE,
+    is_active INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS task_assigner_relation (
+    task_id INTEGER PRIMARY KEY REFERENCES data_task(id),
+    assigner_id INTEGER NOT NULL REFERENCES assigner(id)
+);
+CREATE INDEX IF NOT EXISTS idx_relation_record_id ON task_record_relation (record_id);
+CREATE INDEX IF NOT EXISTS idx_record_batch ON data_record (batch, is_validated);
+CREATE INDEX IF NOT EXISTS idx_task_batch ON data_task (batch, is_finished, is_validated);
+CREATE INDEX IF NOT EXISTS idx_task_assigner_id ON task_assigner_relation (assigner_id);
+"""
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+class TaskRepository:
+    """数据记录、任务与标注员的增查改"""
+
+    def __init__(self, db_path, batch_size=10000):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # 数据记录
+
+    def import_records(self, batch, csv_path):
+        """把原始CSV逐行导入为数据记录，返回 (首条记录id, 记录数)；记录id按CSV顺序连续分配"""
+        first_id = (self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM data_record").fetchone()[0]) + 1
+        count = 0
+        with open(csv_path, 'r', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            for rows in _batched(reader, self.batch_size):
+                with self.conn:
+                    self.conn.executemany(
+                        "INSERT INTO data_record (id, batch, raw) VALUES (?, ?, ?)",
+                        ((first_id + count + i, batch, json.dumps(row, ensure_ascii=False))
+                         for i, row in enumerate(rows)))
+                count += len(rows)
+        LOGGER.info("导入数据记录 | 批次: %s | 记录数: %d", batch, count)
+        return first_id, count
+
+    def get_record(self, record_id):
+        row = self.conn.execute("SELECT id, batch, raw, ann, is_validated FROM data_record WHERE id = ?",
+                                (record_id,)).fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "batch": row[1], "raw": json.loads(row[2]),
+                "ann": json.loads(row[3]) if row[3] is not None else None, "is_validated": bool(row[4])}
+
+    # 任务
+
+    def create_task(self, batch, record_ids, file_path=None):
+        """创建任务，record_ids 为任务文件中各行对应的记录id（按行顺序）"""
+        with self.conn:
+            task_id = self.conn.execute("INSERT INTO data_task (batch, file_path) VALUES (?, ?)",
+                                        (batch, file_path)).lastrowid
+            count = 0
+            for record_batch in _batched(record_ids, self.batch_size):
+                self.conn.executemany(
+                    "INSERT INTO task_record_relation (task_id, position, record_id) VALUES (?, ?, ?)",
+                    ((task_id, count + i, record_id) for i, record_id in enumerate(record_batch)))
+                count += len(record_batch)
+            self.conn.execute("UPDATE data_task SET record_count = ? WHERE id = ?", (count, task_id))
+        return task_id
+
+    def create_split_tasks(self, batch, first_record_id, total_rows, n, check_gap=0.2, part_paths=None):
+        """按 splitter.split_csv 的分块方式为每个分割文件创建任务（含追加到末尾的重叠行），返回任务id列表"""
+        chunk_lengths, overlap_sizes = chunk_layout(total_rows, n, check_gap)
+        starts = [first_record_id + sum(chunk_lengths[:i]) for i in range(n)]
+        task_ids = []
+        for i in range(n):
+            next_i = (i + 1) % n
+            record_ids = itertools.chain(range(starts[i], starts[i] + chunk_lengths[i]),
+                                         range(starts[next_i], starts[next_i] + overlap_sizes[next_i]))
+            task_ids.append(self.create_task(batch, record_ids, part_paths[i] if part_paths else None))
+        return task_ids
+
+    # 标注员
+
+    def register_assigner(self, username, real_name=None):
+        """注册标注员，返回标注员id"""
+        with self.conn:
+            return self.conn.execute("INSERT INTO assigner (username, real_name) VALUES (?, ?)",
+                                     (username, real_name)).lastrowid
+
+    def deactivate_assigner(self, assigner_id):
+        with self.conn:
+            self.conn.execute("UPDATE assigner SET is_active = 0 WHERE id = ?", (assigner_id,))
+
+    def assign_task(self, task_id, assigner_id):
+        """把任务分配给标注员；已分配的任务改为新的标注员"""
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO task_assigner_relation (task_id, assigner_id) VALUES (?, ?)",
+                              (task_id, assigner_id))
+
+    def get_assigner_status(self, assigner_id):
+        """标注员当前各任务的状态"""
+        rows = self.conn.execute(
+            "SELECT t.id, t.batch, t.file_path, t.record_count, t.is_finished, t.is_validated "
+            "FROM task_assigner_relation r JOIN data_task t ON t.id = r.task_id "
+            "WHERE r.assigner_id = ? ORDER BY t.id", (assigner_id,)).fetchall()
+        return [{"task_id": row[0], "batch": row[1], "file_path": row[2], "record_count": row[3],
+                 "is_finished": bool(row[4]), "is_validated": bool(row[5])} for row in rows]
+
+    # 标注结果
+
+    def import_task_result(self, task_id, csv_path, fields=None):
+        """导入标注员交回的CSV：第k行的标注结果写入任务第k个关系行，完成后任务标记为已完成
+
+        fields 为需要保存的标注字段，默认保存整行。行数与任务记录数不符时抛出ValueError且不写入任何结果。
+        """
+        record_count = self.conn.execute("SELECT record_count FROM data_task WHERE id = ?", (task_id,)).fetchone()
+        if record_count is None:
+            raise ValueError(f"任务不存在: {task_id}")
+
+        count = 0
+        with self.conn, open(csv_path, 'r', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            for rows in _batched(reader, self.batch_size):
+                self.conn.executemany(
+                    "UPDATE task_record_relation SET ann = ? WHERE task_id = ? AND position = ?",
+                    ((json.dumps({field: row.get(field) for field in fields} if fields else row, ensure_ascii=False),
+                      task_id, count + i) for i, row in enumerate(rows)))
+                count += len(rows)
+            if count != record_count[0]:
+                raise ValueError(f"标注结果行数 {count} 与任务记录数 {record_count[0]} 不符: {csv_path}")
+            self.conn.execute("UPDATE data_task SET is_finished = 1 WHERE id = ?", (task_id,))
+        LOGGER.info("导入标注结果 | 任务: %d | 行数: %d", task_id, count)
+
+    def validate_task(self, task_id):
+        """验收通过：任务的标注结果写入数据记录并标记为已验收（重叠记录以最后验收的任务为准）"""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE data_record SET is_validated = 1, ann = ("
+                "SELECT r.ann FROM task_record_relation r WHERE r.task_id = ? AND r.record_id = data_record.id) "
+                "WHERE id IN (SELECT record_id FROM task_record_relation WHERE task_id = ?)", (task_id, task_id))
+            self.conn.execute("UPDATE data_task SET is_validated = 1 WHERE id = ?", (task_id,))
+
+    # 统计查询
+
+    def unfinished_tasks_per_assigner(self):
+        """各在职标注员未完成的任务数"""
+        rows = self.conn.execute(
+            "SELECT a.id, a.username, COUNT(t.id) FROM assigner a "
+            "LEFT JOIN task_assigner_relation r ON r.assigner_id = a.id "
+            "LEFT JOIN data_task t ON t.id = r.task_id AND t.is_finished = 0 "
+            "WHERE a.is_active = 1 GROUP BY a.id ORDER BY a.id").fetchall()
+        return [{"assigner_id": row[0], "username": row[1], "unfinished_tasks": row[2]} for row in rows]
+
+    def validation_status_per_batch(self):
+        """各批次的任务数、已完成任务数、已验收任务数，以及已验收任务覆盖的记录数（含重叠行）"""
+        rows = self.conn.execute(
+            "SELECT batch, COUNT(*), SUM(is_finished), SUM(is_validated), SUM(record_count * is_validated) "
+            "FROM data_task GROUP BY batch ORDER BY batch").fetchall()
+        return [{"batch": row[0], "tasks": row[1], "finished_tasks": row[2], "validated_tasks": row[3],
+                 "validated_task_records": row[4]} for row in rows]
+
+    def tasks_of_record(self, record_id):
+        """包含该记录的任务id（重叠行属于两个任务）"""
+        return [row[0] for row in self.conn.execute(
+            "SELECT task_id FROM task_record_relation WHERE record_id = ? ORDER BY task_id", (record_id,))]
@@ -0,0 +1,74 @@
+"""验证结果缓存：按文件内容指纹、check_gap与授权号索引版本缓存单个文件的验证计数，重新验证时只处理变化的文件"""
+import hashlib
+import json
+import logging
+import os
+
+LOGGER = logging.getLogger(__name__)
+
+CACHE_VERSION = 2
+
+
+class ResultCache:
+    """保存在单个JSON文件中的逐文件验证结果缓存"""
+
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self.fingerprints = {}  # 文件路径 -> {size, mtime_ns, sha1}，文件未变化时免去重复计算哈希
+        self.results = {}  # 缓存键 -> 单个文件的验证结果
+        # 本次运行用到的缓存键与文件，保存时只保留这些，旧文件与旧参数的结果随之淘汰
+        self._seen_keys = set()
+        self._seen_paths = set()
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'r', encoding='utf-8') as file:
+                    data = json.load(file)
+            except (OSError, ValueError):
+                LOGGER.warning("验证结果缓存无法读取，将重新验证: %s", cache_path)
+            else:
+                if data.get("version") == CACHE_VERSION:
+                    self.fingerprints = data.get("fingerprints", {})
+                    self.results = data.get("results", {})
+
+    def fingerprint(self, file_path):
+        """文件内容的SHA-1；大小与修改时间未变时直接复用上次结果"""
+        stat = os.stat(file_path)
+        self._seen_paths.add(file_path)
+        known = self.fingerprints.get(file_path)
+        if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+            return known["sha1"]
+
+        digest = hashlib.sha1()
+        with open(file_path, 'rb') as file:
+            for block in iter(lambda: file.read(1024 * 1024), b''):
+                digest.update(block)
+        self.fingerprints[file_path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                                        "sha1": digest.hexdigest()}
+        return digest.hexdigest()
+
+    def key(self, file_path, next_file, check_gap, auth_version, duplicates="last"):
+        """单个文件的结果取决于自身内容、下一个文件的内容、重叠比例、授权号数据和重复名称策略"""
+        parts = [self.fingerprint(file_path), self.fingerprint(next_file), check_gap, auth_version, duplicates]
+        key = hashlib.sha1(json.dumps(parts).encode('utf-8')).hexdigest()
+        self._seen_keys.add(key)
+        return key
+
+    def get(self, key):
+        return self.results.get(key)
+
+    def put(self, key, result):
+        """只缓存处理成功的结果；读取失败等未处理的文件下次重新验证"""
+        if not result.get("processed"):
+            self.results.pop(key, None)
+            return
+        self.results[key] = {name: value for name, value in result.items() if name not in ("log", "metrics")}
+
+    def save(self):
+        """原子写入缓存文件，淘汰本次运行未用到的结果与文件指纹"""
+        results = {key: value for key, value in self.results.items() if key in self._seen_keys}
+        fingerprints = {path: value for path, value in self.fingerprints.items() if path in self._seen_paths}
+        tmp_path = f'{self.cache_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({"version": CACHE_VERSION, "fingerprints": fingerprints,
+                       "results": results}, file, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
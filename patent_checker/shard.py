@@ -0,0 +1,199 @@
+"""分片验证：把有序的分割文件列表按连续区间分给多台机器，各节点输出原始计数的部分结果，合并后得到与单机完全相同的平均值
+
+每个节点只需要本分片的文件以及区间末尾的下一个文件（交叉验证来源）：
+    python -m patent_checker.shard run --shard 0 --shards 4 --output shard_0.json part_*.csv
+合并：
+    python -m patent_checker.shard merge shard_*.json
+"""
+import argparse
+import json
+import logging
+import os
+import time
+
+from . import checker
+from .consistency import DUPLICATE_POLICIES, DUPLICATES_LAST
+from .normalizer import open_publication_number_index
+
+LOGGER = logging.getLogger(__name__)
+
+PARTIAL_VERSION = 1
+
+# 部分结果中保留的逐文件原始计数
+COUNT_FIELDS = ("processed", "rows", "exist_count", "match_count", "valid_count")
+
+
+def shard_range(total_files, shard, shards):
+    """第shard个分片负责的连续文件区间 [start, stop)，各分片文件数至多相差1"""
+    if not 0 <= shard < shards:
+        raise ValueError(f"分片序号超出范围: {shard}/{shards}")
+    return total_files * shard // shards, total_files * (shard + 1) // shards
+
+
+def shard_files(csv_files, shard, shards):
+    """分片需要的文件：区间内的文件加上区间末尾的下一个文件（环形）"""
+    start, stop = shard_range(len(csv_files), shard, shards)
+    if start == stop:
+        return []
+    return csv_files[start:stop] + [csv_files[stop % len(csv_files)]]
+
+
+def validate_shard(csv_files, shard, shards, check_gap=0.2,
+                   auth_dict_path="patent-checker-main/data/raw/专利申请人.json",
+                   workers=None, auth_dict=None, tolerant=False, duplicates=DUPLICATES_LAST, output_path=None):
+    """验证完整有序文件列表中的一个分片，返回（并可写出）只含原始计数的部分结果
+
+    csv_files 为所有节点共用的完整文件列表，只有本分片的文件及其后继需要在本机存在。
+    """
+    if duplicates not in DUPLICATE_POLICIES:
+        raise ValueError(f"未知的重复名称策略: {duplicates}")
+    start, stop = shard_range(len(csv_files), shard, shards)
+    missing_files = [f for f in shard_files(csv_files, shard, shards) if not os.path.exists(f)]
+    if missing_files:
+        raise FileNotFoundError(f"分片文件缺失: {', '.join(missing_files)}")
+
+    LOGGER.info("分片 %d/%d | 文件区间: [%d, %d) | 共 %d 个文件", shard + 1, shards, start, stop, len(csv_files))
+    start_time = time.time()
+    if auth_dict is None:
+        auth_dict = checker.load_authorization_index(auth_dict_path)
+    if not auth_dict:
+        raise RuntimeError("专利申请人字典为空")
+    if tolerant:
+        auth_dict = open_publication_number_index(getattr(auth_dict, "json_path", None) or auth_dict_path, auth_dict)
+
+    files = []
+    mismatches = []
+    for result in checker._iter_file_results(csv_files, check_gap, workers, range(start, stop), auth_dict,
+                                             duplicates):
+        for level, msg, args in result.pop("log"):
+            LOGGER.log(level, msg, *args)
+        result.pop("metrics")
+        files.append(dict({field: result.get(field, 0) for field in COUNT_FIELDS},
+                          file=result["file"], next_file=result["next_file"]))
+        mismatches.extend(dict(row, file=result["file"], next_file=result["next_file"])
+                          for row in result.get("mismatches", []))
+    for index, file_counts in enumerate(files, start):
+        file_counts["index"] = index
+
+    partial = {
+        "version": PARTIAL_VERSION,
+        "total_files": len(csv_files),
+        "shard": shard,
+        "shards": shards,
+        "start": start,
+        "stop": stop,
+        "check_gap": check_gap,
+        "duplicates": duplicates,
+        "tolerant": tolerant,
+        "auth_version": getattr(auth_dict, "version", None),
+        "elapsed": time.time() - start_time,
+        "files": files,
+        "mismatches": mismatches,
+    }
+    if output_path:
+        tmp_path = f'{output_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(partial, f, ensure_ascii=False)
+        os.replace(tmp_path, output_path)
+    LOGGER.info("分片 %d/%d 完成 | 耗时: %.2f秒", shard + 1, shards, partial["elapsed"])
+    return partial
+
+
+def merge_partials(partials):
+    """合并各分片的部分结果；各分片须来自同一文件列表与参数，且区间恰好覆盖全部文件
+
+    按文件顺序由原始计数重新计算逐文件比率后取平均，与单机 validate_files 的结果逐位相同。
+    """
+    if not partials:
+        raise ValueError("没有可合并的部分结果")
+    partials = sorted(partials, key=lambda partial: partial["start"])
+    first = partials[0]
+    for partial in partials:
+        if partial.get("version") != PARTIAL_VERSION:
+            raise ValueError(f"不支持的部分结果版本: {partial.get('version')}")
+        for field in ("total_files", "check_gap", "duplicates", "tolerant"):
+            if partial[field] != first[field]:
+                raise ValueError(f"各分片的 {field} 不一致: {partial[field]} != {first[field]}")
+        if partial["auth_version"] != first["auth_version"]:
+            LOGGER.warning("各分片的授权号索引版本不同: %s != %s", partial["auth_version"], first["auth_version"])
+
+    position = 0
+    for partial in partials:
+        if partial["start"] != position:
+            raise ValueError(f"分片区间不连续: 缺少或重复 [{position}, {partial['start']})")
+        position = partial["stop"]
+    if position != first["total_files"]:
+        raise ValueError(f"分片区间不完整: 缺少 [{position}, {first['total_files']})")
+
+    total_existence_rate = 0.0
+    total_consistency_rate = 0.0
+    processed_files = 0
+    mismatches = []
+    for partial in partials:
+        for file_counts in partial["files"]:
+            if not file_counts["processed"]:
+                continue
+            total_existence_rate += file_counts["exist_count"] / file_counts["rows"]
+            if file_counts["match_count"]:
+                total_consistency_rate += file_counts["valid_count"] / file_counts["match_count"]
+            processed_files += 1
+        mismatches.extend(partial["mismatches"])
+
+    if not processed_files:
+        LOGGER.error("未成功处理任何文件")
+        return None
+    avg_existence = total_existence_rate / processed_files
+    avg_consistency = total_consistency_rate / processed_files
+    LOGGER.info("合并完成 | 分片数: %d | 文件数: %d | 平均专利存在率: %.2f%% | 平均交叉验证一致率: %.2f%%",
+                len(partials), processed_files, avg_existence * 100, avg_consistency * 100)
+    return {"avg_existence_rate": avg_existence,
+            "avg_consistency_rate": avg_consistency,
+            "processed_files": processed_files,
+            "mismatches": mismatches}
+
+
+def load_partials(paths):
+    partials = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            partials.append(json.load(f))
+    return partials
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="分片专利数据验证")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="验证一个分片，输出部分结果")
+    run.add_argument("--shard", type=int, required=True, help="分片序号，从0开始")
+    run.add_argument("--shards", type=int, required=True, help="分片总数")
+    run.add_argument("--output", required=True, help="部分结果JSON输出路径")
+    run.add_argument("--check-gap", type=float, default=0.2, help="交叉验证重叠比例")
+    run.add_argument("--auth-dict", default="patent-checker-main/data/raw/专利申请人.json", help="专利申请人JSON")
+    run.add_argument("--workers", type=int, default=None, help="本节点的并行进程数")
+    run.add_argument("--tolerant", action="store_true", help="容错匹配专利号")
+    run.add_argument("--duplicates", choices=DUPLICATE_POLICIES, default=DUPLICATES_LAST, help="重复名称策略")
+    run.add_argument("csv_files", nargs="+", help="完整的有序分割文件列表")
+
+    merge = commands.add_parser("merge", help="合并各分片的部分结果")
+    merge.add_argument("--output", default=None, help="合并结果JSON输出路径")
+    merge.add_argument("partials", nargs="+", help="部分结果JSON")
+
+    args = parser.parse_args(argv)
+    checker.setup_logging()
+    if args.command == "run":
+        validate_shard(args.csv_files, args.shard, args.shards, args.check_gap, args.auth_dict,
+                       workers=args.workers, tolerant=args.tolerant, duplicates=args.duplicates,
+                       output_path=args.output)
+        return
+
+    result = merge_partials(load_partials(args.partials))
+    if result is None:
+        raise SystemExit(1)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
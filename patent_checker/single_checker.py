@@ -1,7 +1,12 @@
 import json
+import os
 import pandas as pd
 
-print ("开始读取专利申请人数据")
+from . import columnar_cache
+from .auth_index import open_auth_index
+
+AUTH_JSON_PATH = "data/专利申请人.json"
+
 def create_authorization_dict():
     try:
         with open("data/专利申请人.json", 'r', encoding='utf-8') as file:
@@ -19,37 +24,129 @@ def create_authorization_dict():
         return {}
     return {}
 
-auth_dict = create_authorization_dict()
-print ("读取专利申请人数据完毕")
+def load_authorization_index(json_path=AUTH_JSON_PATH):
+    """打开授权号索引，首次运行或数据更新时自动编译"""
+    try:
+        return open_auth_index(json_path)
+    except FileNotFoundError:
+        print("错误：找不到文件 专利申请人.json")
+        return {}
+    except json.JSONDecodeError:
+        print("错误：JSON文件格式不正确")
+        return {}
+    except Exception as e:
+        print(f"发生错误：{str(e)}")
+        return {}
+
+# 已成功加载的授权号索引：json路径 -> 索引
+_AUTH_DICTS = {}
 
-def check_authorization_number(target_number):
+def get_auth_dict(json_path=AUTH_JSON_PATH):
+    """首次调用时加载授权号索引，之后复用同一个对象
+
+    加载失败时返回的空dict不缓存，文件补齐或修复后下次调用会重新加载
+    """
+    auth_dict = _AUTH_DICTS.get(json_path)
+    if auth_dict is not None:
+        return auth_dict
+    print ("开始读取专利申请人数据")
+    auth_dict = load_authorization_index(json_path)
+    print ("读取专利申请人数据完毕")
+    if auth_dict:
+        _AUTH_DICTS[json_path] = auth_dict
+    return auth_dict
+
+def check_authorization_number(target_number, auth_dict=None):
+    if auth_dict is None:
+        auth_dict = get_auth_dict()
     return target_number in auth_dict
 
-def process_csv_file(csv_file):
+def _present(column):
+    """与逐行 `if value:` 相同的真值判断，但缺失值(NaN)视为不存在"""
+    if pd.api.types.is_bool_dtype(column) or pd.api.types.is_numeric_dtype(column):
+        return column.notna() & (column != 0)
+    return column.notna() & (column != '')
+
+
+def _isin_auth(values, auth_dict):
+    """对一列专利公开号批量判断是否在授权库中，每个不同的号码只查询一次"""
+    uniques = pd.unique(values)
+    if hasattr(auth_dict, 'isin'):
+        found = uniques[auth_dict.isin(uniques)]
+    else:
+        found = [value for value in uniques if value in auth_dict]
+    return values.isin(found)
+
+
+def _iter_chunks(csv_file, chunksize):
+    """分块读取CSV；启用列式缓存时从内存映射的Arrow文件读取所需列"""
+    table = columnar_cache.load_table(csv_file)
+    if table is None:
+        with pd.read_csv(csv_file, encoding='utf-8-sig', chunksize=chunksize) as reader:
+            yield from reader
+        return
+    for start in range(0, table.num_rows, chunksize):
+        chunk = columnar_cache.to_dataframe(table.slice(start, chunksize))
+        chunk.index += start
+        yield chunk
+
+
+def process_csv_file(csv_file, chunksize=100000, return_flags=False, auth_dict=None):
+    """按列统计四个质检计数，分块读取以支持大文件
+
+    return_flags为True时额外返回未通过质检的行（当前名称缺失或专利公开号不在授权库中）及其逐行标记；
+    auth_dict为空时使用 get_auth_dict() 加载的授权号索引
+    """
+    if auth_dict is None:
+        auth_dict = get_auth_dict()
     count_now_name = 0
     count_have_patent_fixed = 0
     count_patent_publication_number = 0
     success_patent_publication_number = 0
-    with open(csv_file, 'r', encoding='utf-8') as file:
-        reader = pd.read_csv(file)
-        for index, row in reader.iterrows():
-            now_name = row['now_name']
-            if now_name:
-                count_now_name += 1
-            patent_fixed = row['patent_fixed']
-            if patent_fixed:
-                count_have_patent_fixed += 1
-            patent_publication_number = row['patent_publication_number']
-            if patent_publication_number:
-                count_patent_publication_number += 1
-                if check_authorization_number(patent_publication_number):
-                    success_patent_publication_number += 1
-    return count_now_name, count_have_patent_fixed, count_patent_publication_number, success_patent_publication_number
+    failing_rows = []
+    for chunk in _iter_chunks(csv_file, chunksize):
+        has_now_name = _present(chunk['now_name'])
+        has_patent_fixed = _present(chunk['patent_fixed'])
+        has_publication_number = _present(chunk['patent_publication_number'])
+        is_authorized = has_publication_number.copy()
+        is_authorized[has_publication_number] = _isin_auth(
+            chunk.loc[has_publication_number, 'patent_publication_number'], auth_dict)
+
+        count_now_name += int(has_now_name.sum())
+        count_have_patent_fixed += int(has_patent_fixed.sum())
+        count_patent_publication_number += int(has_publication_number.sum())
+        success_patent_publication_number += int(is_authorized.sum())
+
+        if return_flags:
+            flags = pd.DataFrame({
+                'row': chunk.index + 1,
+                'has_now_name': has_now_name,
+                'has_patent_fixed': has_patent_fixed,
+                'has_patent_publication_number': has_publication_number,
+                'is_authorized': is_authorized,
+            })
+            failing = ~has_now_name | (has_publication_number & ~is_authorized)
+            failing_rows.append(flags[failing])
+
+    counts = (count_now_name, count_have_patent_fixed, count_patent_publication_number,
+              success_patent_publication_number)
+    if return_flags:
+        columns = ['row', 'has_now_name', 'has_patent_fixed', 'has_patent_publication_number', 'is_authorized']
+        flags = pd.concat(failing_rows, ignore_index=True) if failing_rows else pd.DataFrame(columns=columns)
+        return counts + (flags,)
+    return counts
 
 def main ():
     # 此处文件路径填写需要检查的文件路径
     csv_file = "example.csv"
-    count_now_name, count_have_patent_fixed, count_patent_publication_number, success_patent_publication_number = process_csv_file(csv_file)
+    # 设置了 PATENT_CHECKER_DAEMON 时交由常驻服务检查，省去加载授权号数据
+    daemon_url = os.environ.get("PATENT_CHECKER_DAEMON")
+    if daemon_url:
+        from .daemon import check_csv
+        counts = check_csv(csv_file, daemon_url)
+    else:
+        counts = process_csv_file(csv_file)
+    count_now_name, count_have_patent_fixed, count_patent_publication_number, success_patent_publication_number = counts
     print(f"当前名称数量: {count_now_name} / 50")
     print(f"有专利数量: {count_have_patent_fixed} / 50")
     print(f"专利公开号数量: {count_patent_publication_number} / 50")
@@ -1,32 +1,188 @@
 """分割待匹配数据代码，n参数为需要分割的文件数量，check_gap参数为交叉验证的重叠比例"""
 import csv
+import itertools
 import math
 import os
 
-def split_csv(input_path, n, check_gap = 0.2):
+
+def count_rows(input_path):
+    """预扫描统计数据行数（不含表头），只计数不保存记录；不使用列式缓存，生成旁路文件需要把整个文件的列读入内存"""
     with open(input_path, 'r', encoding='utf-8-sig') as f:
         reader = csv.reader(f)
-        header = next(reader)
-        rows = list(reader)
-    
-    total_rows = len(rows)
+        next(reader)
+        return sum(1 for _ in reader)
+
+
+def chunk_layout(total_rows, n, check_gap):
+    """各块的行数与重叠行数：第i块开头的 overlap_sizes[i] 行同时追加到第i-1个分割文件末尾"""
     chunk_size = math.ceil(total_rows / n)
-    chunks = [rows[i*chunk_size : min((i+1)*chunk_size, total_rows)] for i in range(n)]
-    
-    output_dir = os.path.splitext(input_path)[0] + "_split"
+    chunk_lengths = [max(0, min((i+1)*chunk_size, total_rows) - i*chunk_size) for i in range(n)]
+    overlap_sizes = [math.ceil(length * check_gap) for length in chunk_lengths]
+    return chunk_lengths, overlap_sizes
+
+
+def infer_chunk_layout(part_rows, check_gap):
+    """由 split_csv 各分割文件的行数反推分块方式，返回 (chunk_lengths, overlap_sizes)
+
+    第i个分割文件的行数为 chunk_lengths[i] + overlap_sizes[i+1]（末尾复制自下一块开头的重叠行）。
+    part_rows 按分割顺序排列，无法得知行数的文件为None；没有与之相符的分块方式时抛出ValueError。
+    """
+    n = len(part_rows)
+    known = [rows for rows in part_rows if rows is not None]
+    if not n or not known:
+        raise ValueError("没有可用于推算分块方式的文件行数")
+    # 除最后一块外每块都是 chunk_size 行，行数最多的文件约为 chunk_size + ceil(chunk_size*check_gap)
+    estimate = int(max(known) / (1 + check_gap))
+    for chunk_size in range(max(0, estimate - 2), estimate + 3):
+        for total_rows in range(max(0, (chunk_size - 1) * n + 1), chunk_size * n + 1):
+            chunk_lengths, overlap_sizes = chunk_layout(total_rows, n, check_gap)
+            if all(rows is None or rows == chunk_lengths[i] + overlap_sizes[(i + 1) % n]
+                   for i, rows in enumerate(part_rows)):
+                return chunk_lengths, overlap_sizes
+    raise ValueError("文件行数与 split_csv 的分割方式不符")
+
+
+def split_dir(input_path):
+    return os.path.splitext(input_path)[0] + "_split"
+
+
+def split_csv(input_path, n, check_gap = 0.2):
+    """流式分割：先计数再单次遍历写出各分割文件，内存中只缓存每块开头的重叠部分"""
+    total_rows = count_rows(input_path)
+    chunk_lengths, overlap_sizes = chunk_layout(total_rows, n, check_gap)
+
+    output_dir = split_dir(input_path)
     os.makedirs(output_dir, exist_ok=True)
-    
-    for i in range(n):
-        current_chunk = chunks[i]
-        next_idx = (i+1) % n
-        overlap_size = math.ceil(len(chunks[next_idx]) * check_gap)
-        combined = current_chunk + chunks[next_idx][:overlap_size]
-        
-        output_path = os.path.join(output_dir, f'part_{i+1}.csv')
-        with open(output_path, 'w', newline='', encoding='utf-8-sig') as f:
-            writer = csv.writer(f)
+
+    previous_file = current_file = None
+    try:
+        with open(input_path, 'r', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            first_head = []
+
+            for i in range(n):
+                output_path = os.path.join(output_dir, f'part_{i+1}.csv')
+                current_file = open(output_path, 'w', newline='', encoding='utf-8-sig')
+                writer = csv.writer(current_file)
+                writer.writerow(header)
+
+                chunk_rows = itertools.islice(reader, chunk_lengths[i])
+                head = list(itertools.islice(chunk_rows, overlap_sizes[i]))
+                writer.writerows(head)
+
+                # 上一个分割文件拿到重叠部分后即可关闭
+                if previous_file is None:
+                    first_head = head
+                else:
+                    csv.writer(previous_file).writerows(head)
+                    previous_file.close()
+
+                writer.writerows(chunk_rows)
+                previous_file = current_file
+
+            # 最后一个分割文件与第一块首尾相接
+            csv.writer(previous_file).writerows(first_head)
+    finally:
+        for file in (previous_file, current_file):
+            if file is not None and not file.closed:
+                file.close()
+
+
+# 重叠行两个版本不一致时的处理策略
+CONFLICT_OWNER = "owner"  # 采用该行所属分割文件中的版本
+CONFLICT_OVERLAP = "overlap"  # 采用前一个分割文件末尾重叠部分中的版本
+CONFLICT_ERROR = "error"  # 抛出ValueError
+CONFLICT_POLICIES = (CONFLICT_OWNER, CONFLICT_OVERLAP, CONFLICT_ERROR)
+
+
+def _read_part(part_path, header):
+    """打开分割文件并校验表头，返回 (文件, reader)"""
+    f = open(part_path, 'r', encoding='utf-8-sig')
+    reader = csv.reader(f)
+    part_header = next(reader, None)
+    if header is not None and part_header != header:
+        f.close()
+        raise ValueError(f"分割文件表头不一致: {part_path}")
+    return f, reader, part_header
+
+
+def _take(reader, count, part_path):
+    rows = list(itertools.islice(reader, count))
+    if len(rows) != count:
+        raise ValueError(f"分割文件行数与原始数据不符: {part_path}")
+    return rows
+
+
+def merge_parts(input_path, n, check_gap=0.2, parts_dir=None, output_path=None,
+                policy=CONFLICT_OWNER, conflicts_path=None):
+    """把（标注完成的）分割文件按原始数据顺序流式合并，去掉 split_csv 复制的重叠行
+
+    分块方式由原始数据行数、n 与 check_gap 按 split_csv 的规则重新推算，每个分割文件的行数须与之一致。
+    每个重叠行有两个版本：所属分割文件开头的版本和前一个分割文件末尾的版本，不一致时按 policy 处理，
+    指定 conflicts_path 时把冲突行写为CSV（原始行号、两个来源文件及两个版本）。
+    内存中只缓存一个重叠部分，与数据集大小无关。返回 {rows, duplicates_removed, conflicts}
+    """
+    if policy not in CONFLICT_POLICIES:
+        raise ValueError(f"未知的冲突处理策略: {policy}")
+    parts_dir = parts_dir or split_dir(input_path)
+    output_path = output_path or os.path.splitext(input_path)[0] + "_merged.csv"
+    part_paths = [os.path.join(parts_dir, f'part_{i+1}.csv') for i in range(n)]
+    chunk_lengths, overlap_sizes = chunk_layout(count_rows(input_path), n, check_gap)
+
+    # 第一块开头的重叠版本在最后一个分割文件末尾，先取出来
+    f, reader, header = _read_part(part_paths[-1], None)
+    with f:
+        _take(reader, chunk_lengths[-1], part_paths[-1])
+        previous_tail = _take(reader, overlap_sizes[0], part_paths[-1])
+
+    stats = {"rows": 0, "duplicates_removed": 0, "conflicts": 0}
+    tmp_path = f'{output_path}.{os.getpid()}.tmp'
+    conflicts_file = None
+    try:
+        with open(tmp_path, 'w', newline='', encoding='utf-8-sig') as output:
+            writer = csv.writer(output)
             writer.writerow(header)
-            writer.writerows(combined)
+            if conflicts_path:
+                conflicts_file = open(conflicts_path, 'w', newline='', encoding='utf-8-sig')
+                conflicts_writer = csv.writer(conflicts_file)
+                conflicts_writer.writerow(["row", "owner_part", "overlap_part", "version"] + header)
+
+            row_number = 0
+            for i, part_path in enumerate(part_paths):
+                overlap_part = os.path.basename(part_paths[i - 1])
+                f, reader, _ = _read_part(part_path, header)
+                with f:
+                    for owner_row, overlap_row in zip(_take(reader, overlap_sizes[i], part_path), previous_tail):
+                        row_number += 1
+                        if owner_row != overlap_row:
+                            stats["conflicts"] += 1
+                            if policy == CONFLICT_ERROR:
+                                raise ValueError(f"第 {row_number} 行在 {part_path} 与 {overlap_part} 中不一致")
+                            if conflicts_file is not None:
+                                conflicts_writer.writerow([row_number, os.path.basename(part_path), overlap_part,
+                                                           "owner"] + owner_row)
+                                conflicts_writer.writerow([row_number, os.path.basename(part_path), overlap_part,
+                                                           "overlap"] + overlap_row)
+                        writer.writerow(overlap_row if policy == CONFLICT_OVERLAP else owner_row)
+                    stats["duplicates_removed"] += overlap_sizes[i]
+
+                    body_size = chunk_lengths[i] - overlap_sizes[i]
+                    counter = itertools.count()
+                    writer.writerows(row for row, _ in zip(itertools.islice(reader, body_size), counter))
+                    row_number += body_size
+                    previous_tail = _take(reader, overlap_sizes[(i + 1) % n], part_path)
+                    if next(counter) != body_size or next(reader, None) is not None:
+                        raise ValueError(f"分割文件行数与原始数据不符: {part_path}")
+            stats["rows"] = row_number
+        os.replace(tmp_path, output_path)
+    finally:
+        if conflicts_file is not None:
+            conflicts_file.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return stats
+
 
 if __name__ == "__main__":
     split_csv('data/匹配失败起草单位v4_无专利数据.csv', n=5, check_gap=0.2)
@@ -0,0 +1,220 @@
+"""提交目录监视：标注员交回的分割文件放入目录后自动验证，只重新验证新增或变化的文件及以它为重叠来源的前一个文件
+
+    python -m patent_checker.watcher 提交目录 --auth-dict data/专利申请人.json --workers 2
+
+目录中的 part_<序号>.csv 按序号排列为环形文件列表（与 splitter.split_csv 的输出一致）。
+文件大小与修改时间在 debounce 秒内不再变化才视为写入完成；读取、解析与验证在有界的进程池中进行，
+待验证队列已满时扫描暂停，实现背压。每得到一个结果就更新并输出整批的实时汇总。
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import checker
+from .consistency import DUPLICATES_LAST
+from .normalizer import open_publication_number_index
+
+LOGGER = logging.getLogger(__name__)
+
+PART_PATTERN = re.compile(r'^part_(\d+)\.csv$')
+
+
+def list_parts(drop_dir):
+    """目录中按序号排列的分割文件路径"""
+    parts = []
+    for entry in os.scandir(drop_dir):
+        match = PART_PATTERN.match(entry.name)
+        if match and entry.is_file():
+            parts.append((int(match.group(1)), entry.path))
+    return [path for _, path in sorted(parts)]
+
+
+def _signature(file_path):
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class SubmissionWatcher:
+    """监视提交目录并增量验证，summary() 返回当前整批的汇总"""
+
+    def __init__(self, drop_dir, auth_dict, check_gap=0.2, workers=2, debounce=1.0, poll_interval=0.5,
+                 queue_size=None, duplicates=DUPLICATES_LAST, summary_path=None):
+        self.drop_dir = drop_dir
+        self.auth_dict = auth_dict
+        self.check_gap = check_gap
+        self.workers = workers
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.duplicates = duplicates
+        self.summary_path = summary_path
+        self._queue = asyncio.Queue(maxsize=queue_size or workers * 2)
+        self._queued = set()
+        self._in_flight = set()
+        self._observed = {}  # 文件路径 -> (签名, 首次观察到该签名的时间)
+        self._results = {}  # 文件路径 -> (验证时的签名键, 结果)
+        self._parts = []
+        self._stop = asyncio.Event()
+
+    def _stable_signature(self, file_path, now):
+        """签名在 debounce 秒内未变化时返回签名，否则返回None（文件可能仍在写入）"""
+        signature = _signature(file_path)
+        observed = self._observed.get(file_path)
+        if observed is None or observed[0] != signature:
+            self._observed[file_path] = (signature, now)
+            return None if self.debounce > 0 else signature
+        return signature if now - observed[1] >= self.debounce else None
+
+    def _successor(self, file_path):
+        index = self._parts.index(file_path)
+        return self._parts[(index + 1) % len(self._parts)]
+
+    def _key(self, file_path, now):
+        """文件验证结果取决于自身与后继文件的内容；任一方仍在写入时返回None"""
+        successor = self._successor(file_path)
+        signature = self._stable_signature(file_path, now)
+        successor_signature = self._stable_signature(successor, now) if successor != file_path else signature
+        if signature is None or successor_signature is None:
+            return None
+        return signature, successor, successor_signature
+
+    async def _scan(self):
+        """定期扫描目录，把结果已过期且写入完成的文件放入待验证队列（队列满时等待）"""
+        while not self._stop.is_set():
+            now = time.monotonic()
+            self._parts = list_parts(self.drop_dir)
+            for file_path in list(self._parts):
+                if file_path in self._queued or file_path in self._in_flight:
+                    continue
+                key = self._key(file_path, now)
+                known = self._results.get(file_path)
+                if key is None or (known is not None and known[0] == key):
+                    continue
+                self._queued.add(file_path)
+                await self._queue.put((file_path, now))
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _validate(self, executor):
+        loop = asyncio.get_running_loop()
+        while True:
+            file_path, detected = await self._queue.get()
+            self._queued.discard(file_path)
+            if file_path not in self._parts:
+                continue
+            key = self._key(file_path, time.monotonic())
+            if key is None:
+                continue
+            self._in_flight.add(file_path)
+            try:
+                task = (self._parts.index(file_path), len(self._parts), file_path, key[1], self.check_gap,
+                        self.duplicates)
+                result = await loop.run_in_executor(executor, checker._check_file_in_worker, task)
+            finally:
+                self._in_flight.discard(file_path)
+
+            for level, msg, args in result.pop("log"):
+                LOGGER.log(level, msg, *args)
+            result.pop("metrics")
+            # 验证期间文件又有变化时丢弃结果，等待下一次扫描
+            if key != self._key(file_path, time.monotonic()):
+                continue
+            result["latency_seconds"] = time.monotonic() - detected
+            self._results[file_path] = (key, result)
+            self._report()
+
+    def summary(self):
+        """按当前文件顺序汇总已验证且未过期的结果，平均值口径与 validate_files 相同"""
+        total_existence_rate = 0.0
+        total_consistency_rate = 0.0
+        processed_files = 0
+        validated = 0
+        for file_path in self._parts:
+            known = self._results.get(file_path)
+            if known is None or known[0][1] != self._successor(file_path):
+                continue
+            validated += 1
+            result = known[1]
+            if result["processed"]:
+                total_existence_rate += result["existence_rate"]
+                total_consistency_rate += result["consistency_rate"]
+                processed_files += 1
+        return {
+            "files": len(self._parts),
+            "validated": validated,
+            "processed_files": processed_files,
+            "queued": len(self._queued),
+            "in_flight": len(self._in_flight),
+            "avg_existence_rate": total_existence_rate / processed_files if processed_files else None,
+            "avg_consistency_rate": total_consistency_rate / processed_files if processed_files else None,
+            "results": {file_path: self._results[file_path][1] for file_path in self._parts
+                        if file_path in self._results},
+        }
+
+    def _report(self):
+        summary = self.summary()
+        if summary["processed_files"]:
+            LOGGER.info("实时汇总 | 已验证: %d/%d | 平均专利存在率: %.2f%% | 平均交叉验证一致率: %.2f%%",
+                        summary["validated"], summary["files"],
+                        summary["avg_existence_rate"] * 100, summary["avg_consistency_rate"] * 100)
+        if self.summary_path:
+            tmp_path = f'{self.summary_path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, ensure_ascii=False)
+            os.replace(tmp_path, self.summary_path)
+
+    def stop(self):
+        self._stop.set()
+
+    async def run(self):
+        """运行直到 stop() 被调用"""
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=checker._init_worker,
+                                 initargs=checker._worker_initargs(self.auth_dict)) as executor:
+            validators = [asyncio.create_task(self._validate(executor)) for _ in range(self.workers)]
+            try:
+                await self._scan()
+            finally:
+                for validator in validators:
+                    validator.cancel()
+                await asyncio.gather(*validators, return_exceptions=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="监视提交目录并增量验证分割文件")
+    parser.add_argument("drop_dir", help="标注员提交文件的目录")
+    parser.add_argument("--auth-dict", default="patent-checker-main/data/raw/专利申请人.json", help="专利申请人JSON")
+    parser.add_argument("--check-gap", type=float, default=0.2, help="交叉验证重叠比例")
+    parser.add_argument("--workers", type=int, default=2, help="验证进程数")
+    parser.add_argument("--debounce", type=float, default=1.0, help="文件多少秒未变化视为写入完成")
+    parser.add_argument("--tolerant", action="store_true", help="容错匹配专利号")
+    parser.add_argument("--summary", default=None, help="实时汇总JSON输出路径")
+    args = parser.parse_args(argv)
+
+    checker.setup_logging()
+    auth_dict = checker.load_authorization_index(args.auth_dict)
+    if not auth_dict:
+        LOGGER.critical("无法继续: 专利申请人字典为空")
+        raise SystemExit(1)
+    if args.tolerant:
+        auth_dict = open_publication_number_index(getattr(auth_dict, "json_path", None) or args.auth_dict, auth_dict)
+
+    watcher = SubmissionWatcher(args.drop_dir, auth_dict, args.check_gap, args.workers, args.debounce,
+                                summary_path=args.summary)
+    LOGGER.info("开始监视提交目录: %s", args.drop_dir)
+    try:
+        asyncio.run(watcher.run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,26 @@
 # E:\PythonProject1\salary_calculator\__main__.py
+import json
+import os
+
+import pandas as pd
 import typer
-from .calculator import InternSalaryCalculator
+from typer.core import TyperGroup
+
+from .calculator import PAYROLL_COLUMNS, InternSalaryCalculator
+from .piecework import QUALITY_NONE, QUALITY_WEIGHTS, build_piece_tasks
+
+
+class DefaultCommandGroup(TyperGroup):
+    """第一个参数不是子命令时按 calculate 处理，保持 `python -m salary_calculator 张三 B 40` 的用法"""
+
+    def parse_args(self, ctx, args):
+        if args and args[0] not in self.commands and args[0] not in ("--help", "--install-completion",
+                                                                      "--show-completion"):
+            args = ["calculate", *args]
+        return super().parse_args(ctx, args)
+
 
-app = typer.Typer()
+app = typer.Typer(cls=DefaultCommandGroup)
 calc = InternSalaryCalculator()
 
 
@@ -42,5 +60,91 @@ def calculate(
     typer.echo("-" * 40)
 
 
+@app.command()
+def batch(
+        input_csv: str = typer.Argument(..., help=f"每行一个计件任务的CSV，列：{','.join(PAYROLL_COLUMNS)}"),
+        output: str = typer.Option(None, "--output", "-o", help="逐人结果CSV，默认为 <输入>_payroll.csv"),
+        summary: str = typer.Option(None, "--summary", "-s", help="汇总JSON，默认为 <输入>_payroll.json"),
+):
+    """批量计算薪资：一次读取所有实习生，列出全部无效行，写出结果CSV与汇总JSON"""
+    tasks = pd.read_csv(input_csv, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+    _write_payroll(_calculate_payroll(tasks), input_csv, output, summary)
+
+
+def _calculate_payroll(tasks):
+    """批量计算，输入有误时列出全部错误并以状态码1退出"""
+    try:
+        return calc.calculate_payroll(tasks)
+    except ValueError as e:
+        typer.echo(f"错误：{e.args[0]}", err=True)
+        for row, name, message in (e.args[1] if len(e.args) > 1 else []):
+            typer.echo(f"  第{row}行 {name}: {message}", err=True)
+        raise typer.Exit(1)
+
+
+def _write_payroll(payroll, input_csv, output, summary):
+    """写出逐人结果CSV与汇总JSON并显示合计"""
+    base = os.path.splitext(input_csv)[0]
+    output = output or f"{base}_payroll.csv"
+    summary = summary or f"{base}_payroll.json"
+    payroll.to_csv(output, index=False, encoding='utf-8-sig')
+    totals = {
+        "interns": len(payroll),
+        "hourly_wage": float(payroll['hourly_wage'].sum()),
+        "piece_wage": float(payroll['piece_wage'].sum()),
+        "total": float(payroll['total'].sum()),
+        "by_level": {level: {"interns": int(len(group)), "total": float(group['total'].sum())}
+                     for level, group in payroll.groupby('level')},
+    }
+    with open(summary, 'w', encoding='utf-8') as f:
+        json.dump(totals, f, ensure_ascii=False, indent=2)
+
+    typer.echo(f"实习生: {totals['interns']} 人")
+    typer.echo(f"计时工资合计: {totals['hourly_wage']} 元")
+    typer.echo(f"计件工资合计: {totals['piece_wage']} 元")
+    typer.echo(f"总薪资: {totals['total']} 元")
+    typer.echo(f"结果: {output}")
+    typer.echo(f"汇总: {summary}")
+
+
+@app.command()
+def piecework(
+        assignments_csv: str = typer.Argument(..., help="文件与标注员的对应关系CSV，列：file,annotator,level,hours，按分割顺序排列"),
+        rate: float = typer.Option(..., "--rate", "-r", help="每行的计件单价"),
+        auth_dict: str = typer.Option(..., "--auth-dict", help="专利申请人JSON"),
+        check_gap: float = typer.Option(0.2, "--check-gap", help="交叉验证重叠比例"),
+        quality: str = typer.Option(QUALITY_NONE, "--quality", "-q",
+                                    help=f"计件数量的质量加权：{' / '.join(QUALITY_WEIGHTS)}"),
+        output: str = typer.Option(None, "--output", "-o", help="逐人结果CSV，默认为 <输入>_payroll.csv"),
+        summary: str = typer.Option(None, "--summary", "-s", help="汇总JSON，默认为 <输入>_payroll.json"),
+):
+    """验证各标注员交回的文件，并由逐文件计数直接计算计件工资（验证日志写入控制台与 patent_validation.log）"""
+    from patent_checker import checker
+
+    if quality not in QUALITY_WEIGHTS:
+        typer.echo(f"错误：未知的质量加权方式：{quality}", err=True)
+        raise typer.Exit(1)
+    assignments = pd.read_csv(assignments_csv, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+    assignments = assignments.to_dict('records')
+    csv_files = list(dict.fromkeys(row["file"] for row in assignments))
+    missing_files = [file_path for file_path in csv_files if not os.path.exists(file_path)]
+    if missing_files:
+        typer.echo(f"错误：以下文件不存在：{', '.join(missing_files)}", err=True)
+        raise typer.Exit(1)
+
+    checker.setup_logging()
+    result = checker.validate_files(csv_files, check_gap, auth_dict_path=auth_dict)
+    if result is None:
+        typer.echo("错误：验证失败", err=True)
+        raise typer.Exit(1)
+
+    try:
+        tasks = build_piece_tasks(result, assignments, rate, quality, check_gap)
+    except ValueError as e:
+        typer.echo(f"错误：{e}", err=True)
+        raise typer.Exit(1)
+    _write_payroll(_calculate_payroll(tasks), assignments_csv, output, summary)
+
+
 if __name__ == "__main__":
     app()
\ No newline at end of file
@@ -1,3 +1,16 @@
+import pandas as pd
+
+# 批量计算输入CSV的列：每行一个计件任务，没有计件任务的实习生留空 quantity、rate
+PAYROLL_COLUMNS = ['name', 'level', 'hours', 'quantity', 'rate']
+
+
+def _blank(column):
+    """留空的值：字符串列中的空白字符串，数值列中的缺失值"""
+    if pd.api.types.is_numeric_dtype(column):
+        return column.isna()
+    return column.astype(str).str.strip() == ''
+
+
 class InternSalaryCalculator:
     def __init__(self, hourly_rates=None):
         """初始化实习生薪资计算器"""
@@ -35,6 +48,68 @@ class InternSalaryCalculator:
         hourly_wage = self.calculate_hourly_wage(level, hours)
         piece_wage = self.calculate_piecework_wage(piece_items)
         return hourly_wage + piece_wage
+
+    def validate_payroll(self, tasks):
+        """一次性校验批量输入的所有行，返回错误列表 [(行号, 姓名, 错误信息)]，行号为CSV文件中的行号（表头为第1行）"""
+        missing = [column for column in PAYROLL_COLUMNS if column not in tasks.columns]
+        if missing:
+            raise ValueError(f"输入缺少列：{', '.join(missing)}")
+
+        names = tasks['name'].str.strip()
+        hours = pd.to_numeric(tasks['hours'], errors='coerce')
+        quantity = pd.to_numeric(tasks['quantity'], errors='coerce')
+        rate = pd.to_numeric(tasks['rate'], errors='coerce')
+        no_piece = _blank(tasks['quantity']) & _blank(tasks['rate'])
+
+        checks = [
+            (names == '', lambda row: "姓名为空"),
+            (~tasks['level'].isin(list(self.hourly_rates)), lambda row: f"未知职级 '{tasks['level'][row]}'"),
+            (hours.isna(), lambda row: f"工时不是数字：{tasks['hours'][row]}"),
+            (hours < 0, lambda row: f"工时 不能为负数，当前值：{hours[row]}"),
+            (~no_piece & quantity.isna(), lambda row: f"计件数量不是数字：{tasks['quantity'][row]}"),
+            (~no_piece & (quantity < 0), lambda row: f"计件数量 不能为负数，当前值：{quantity[row]}"),
+            (~no_piece & rate.isna(), lambda row: f"计件单价不是数字：{tasks['rate'][row]}"),
+            (~no_piece & (rate < 0), lambda row: f"计件单价 不能为负数，当前值：{rate[row]}"),
+        ]
+        # 同一实习生的职级与工时须在各行一致
+        per_name = pd.DataFrame({'name': names, 'level': tasks['level'], 'hours': hours})
+        inconsistent = per_name.groupby('name')[['level', 'hours']].transform('nunique').gt(1).any(axis=1)
+        checks.append((inconsistent & (names != ''), lambda row: "职级或工时与同名的其他行不一致"))
+
+        errors = []
+        for mask, message in checks:
+            for row in tasks.index[mask.to_numpy()]:
+                errors.append((int(row) + 2, names[row], message(row)))
+        return sorted(errors, key=lambda error: error[0])
+
+    def calculate_payroll(self, tasks):
+        """批量计算多名实习生的薪资，tasks 为按 PAYROLL_COLUMNS 组织的DataFrame（数值列可为CSV中的字符串或数值）
+
+        返回按首次出现顺序排列的逐人结果DataFrame；有无效行时抛出ValueError，args[1] 为全部错误。
+        """
+        errors = self.validate_payroll(tasks)
+        if errors:
+            raise ValueError(f"输入中有 {len(errors)} 处错误", errors)
+
+        names = tasks['name'].str.strip()
+        piece = pd.to_numeric(tasks['quantity'], errors='coerce') * pd.to_numeric(tasks['rate'], errors='coerce')
+        grouped = pd.DataFrame({
+            'name': names,
+            'level': tasks['level'],
+            'hours': pd.to_numeric(tasks['hours']).astype(float),
+            'piece_tasks': piece.notna().astype(int),
+            'piece_wage': piece.fillna(0),
+        }).groupby('name', sort=False)
+
+        payroll = grouped[['level', 'hours']].first()
+        payroll['hourly_rate'] = payroll['level'].map(self.hourly_rates)
+        payroll['hourly_wage'] = payroll['hourly_rate'] * payroll['hours']
+        payroll['piece_tasks'] = grouped['piece_tasks'].sum()
+        payroll['piece_wage'] = grouped['piece_wage'].sum()
+        payroll['performance_wage'] = self.calculate_performance_wage()
+        payroll['total'] = payroll['hourly_wage'] + payroll['piece_wage'] + payroll['performance_wage']
+        return payroll.reset_index()
+
     def calculate_performance_wage(self):
         """绩效工资（暂不考虑，默认为0）"""
         return 0
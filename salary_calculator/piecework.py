@@ -0,0 +1,65 @@
+"""由专利数据验证结果计算标注员的计件工资：validate_files 的逐文件计数按文件-标注员对应关系汇总为计件数量
+
+分割文件末尾的重叠行复制自下一个文件的开头，同一行出现在两名标注员的文件中。
+重叠行只计入下一个文件（该行的原始所属文件）。末尾重叠行数按位置由 split_csv 的分块方式得出
+（splitter.infer_chunk_layout 由各文件行数反推），与名称是否重复、交叉验证是否成功无关。
+"""
+import os
+
+import pandas as pd
+
+from patent_checker.splitter import infer_chunk_layout
+
+from .calculator import PAYROLL_COLUMNS
+
+# 计件数量的质量加权方式
+QUALITY_NONE = "none"  # 计件数量为文件行数
+QUALITY_EXISTENCE = "existence"  # 行数 × 专利存在率
+QUALITY_CONSISTENCY = "consistency"  # 行数 × 交叉验证一致率
+QUALITY_COMBINED = "combined"  # 行数 × 专利存在率 × 交叉验证一致率
+QUALITY_WEIGHTS = (QUALITY_NONE, QUALITY_EXISTENCE, QUALITY_CONSISTENCY, QUALITY_COMBINED)
+
+
+def piece_quantity(file_counts, quality=QUALITY_NONE, overlap_rows=0):
+    """单个文件的计件数量：去掉末尾 overlap_rows 个重叠行后的行数按质量加权；验证失败的文件计为0"""
+    if quality not in QUALITY_WEIGHTS:
+        raise ValueError(f"未知的质量加权方式：{quality}")
+    if not file_counts["processed"]:
+        return 0.0
+    quantity = float(file_counts["rows"] - overlap_rows)
+    if quality in (QUALITY_EXISTENCE, QUALITY_COMBINED):
+        quantity *= file_counts["existence_rate"]
+    if quality in (QUALITY_CONSISTENCY, QUALITY_COMBINED):
+        quantity *= file_counts["consistency_rate"]
+    return quantity
+
+
+def _normalize(file_path):
+    return os.path.normcase(os.path.abspath(file_path))
+
+
+def build_piece_tasks(validation_result, assignments, rate, quality=QUALITY_NONE, check_gap=0.2):
+    """把 validate_files 的结果转为 calculate_payroll 的输入（每个文件一行计件任务）
+
+    assignments 为 [{file, annotator, level, hours}]，file 与验证时的路径指向同一文件即可。
+    validation_result 中的文件须为 split_csv 按 check_gap 分割的全部文件且按分割顺序排列。
+    """
+    files = validation_result["files"]
+    _, overlap_sizes = infer_chunk_layout([counts["rows"] if counts["processed"] else None for counts in files],
+                                          check_gap)
+    counts = {_normalize(file_counts["file"]): dict(file_counts, overlap_rows=overlap_sizes[(i + 1) % len(files)])
+              for i, file_counts in enumerate(files)}
+    rows = []
+    for assignment in assignments:
+        file_counts = counts.get(_normalize(assignment["file"]))
+        if file_counts is None:
+            raise ValueError(f"验证结果中没有文件：{assignment['file']}")
+        rows.append([assignment["annotator"], assignment["level"], assignment["hours"],
+                     piece_quantity(file_counts, quality, file_counts["overlap_rows"]), float(rate)])
+    return pd.DataFrame(rows, columns=PAYROLL_COLUMNS)
+
+
+def calculate_piecework_payroll(calculator, validation_result, assignments, rate, quality=QUALITY_NONE,
+                                check_gap=0.2):
+    """按标注员批量计算薪资，计件部分来自验证结果"""
+    return calculator.calculate_payroll(build_piece_tasks(validation_result, assignments, rate, quality, check_gap))
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""各测试共用的授权号数据与三个环形分割文件"""
+import csv
+import json
+
+import pytest
+
+HEADER = ["name", "have_patent_fixed", "patent_publication_number"]
+
+# check_gap=0.5 时每个文件的前两行即下一个文件的重叠部分
+PART_ROWS = [
+    [["a", "1", "CN1B"], ["b", "0", "X"], ["c", "1", "CN2B"], ["d", "0", ""]],
+    [["c", "1", "CN1B"], ["d", "1", "CN2B"], ["e", "0", "X"], ["f", "0", "Y"]],
+    [["e", "0", "CN1B"], ["f", "0", "Z"], ["a", "1", "CN2B"], ["b", "1", "X"]],
+]
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+    return str(path)
+
+
+@pytest.fixture
+def auth_json(tmp_path):
+    json_path = tmp_path / "专利申请人.json"
+    json_path.write_text(json.dumps([{"授权公告号": "CN1B"}, {"授权公告号": "CN2B"}]), encoding='utf-8')
+    return str(json_path)
+
+
+@pytest.fixture
+def part_rows():
+    return [[list(row) for row in rows] for rows in PART_ROWS]
+
+
+@pytest.fixture
+def part_files(tmp_path, part_rows):
+    return [write_csv(tmp_path / f"part_{i}.csv", rows) for i, rows in enumerate(part_rows, 1)]
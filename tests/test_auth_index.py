@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+import json
+import multiprocessing
+import operator
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from patent_checker import auth_index
+from patent_checker.auth_index import (
+    CompactKeySet, iter_authorization_numbers, iter_json_array, load_authorization_keys, open_auth_index,
+)
+
+RECORDS = [
+    {"授权公告号": "CN100000B", "申请人": "甲公司"},
+    {"授权公告号": "CN100001B", "申请人": "乙公司"},
+    {"授权公告号": "CN100000B", "申请人": "丙公司"},
+    {"授权公告号": "CN1234567U", "申请人": "丁研究所"},
+]
+
+
+def write_json(path, records):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(records, file, ensure_ascii=False, indent=2)
+
+
+def test_iter_json_array_offsets(tmp_path):
+    json_path = tmp_path / "auth.json"
+    write_json(json_path, RECORDS)
+    raw = json_path.read_bytes()
+
+    items = list(iter_json_array(json_path, chunk_size=7))
+    assert [item for _, _, item in items] == RECORDS
+    for offset, length, item in items:
+        assert json.loads(raw[offset:offset + length].decode('utf-8')) == item
+
+
+def test_open_auth_index(tmp_path):
+    json_path = tmp_path / "auth.json"
+    write_json(json_path, RECORDS)
+
+    index = open_auth_index(str(json_path))
+    assert len(index) == 3
+    assert "CN100001B" in index
+    assert "CN999999B" not in index
+    assert "" not in index
+    assert float('nan') not in index
+    assert list(index.isin(["CN1234567U", "CN1234567", None, "CN100000B"])) == [True, False, False, True]
+    # 重复授权公告号以最后一条为准
+    assert index.get("CN100000B")["申请人"] == "丙公司"
+    assert sorted(index) == ["CN100000B", "CN100001B", "CN1234567U"]
+
+
+def test_index_rebuilt_when_source_changes(tmp_path):
+    json_path = tmp_path / "auth.json"
+    write_json(json_path, RECORDS)
+    index = open_auth_index(str(json_path))
+    assert os.path.exists(str(json_path) + ".idx")
+
+    write_json(json_path, RECORDS + [{"授权公告号": "CN200000A", "申请人": "戊公司"}])
+    assert index.is_stale()
+    index = open_auth_index(str(json_path))
+    assert "CN200000A" in index
+    assert len(index) == 4
+
+
+def test_load_authorization_keys_fetches_records_lazily(tmp_path):
+    json_path = tmp_path / "auth.json"
+    write_json(json_path, RECORDS)
+
+    keys = load_authorization_keys(str(json_path))
+    assert len(keys) == 3
+    assert "CN1234567U" in keys
+    assert "CN999999B" not in keys
+    assert keys.get("CN100000B")["申请人"] == "丙公司"
+    assert keys.get("CN999999B") is None
+    assert list(iter_authorization_numbers(str(json_path))) == [r["授权公告号"] for r in RECORDS]
+
+
+@pytest.mark.parametrize("bloom_bits_per_key", [0, 10])
+def test_compact_key_set_matches_auth_key_set(tmp_path, bloom_bits_per_key):
+    json_path = tmp_path / "auth.json"
+    records = RECORDS + [{"授权公告号": f"CN{i:06d}A", "申请人": str(i)} for i in range(2000)]
+    write_json(json_path, records)
+
+    keys = load_authorization_keys(str(json_path))
+    compact = load_authorization_keys(str(json_path), compact=True, bloom_bits_per_key=bloom_bits_per_key)
+    assert isinstance(compact, CompactKeySet)
+    assert len(compact) == len(keys) == 2003
+    assert sorted(compact) == sorted(keys)
+    assert compact.version == keys.version
+
+    queries = [r["授权公告号"] for r in records] + [f"CN{i:06d}B" for i in range(2000)] + ["", "CN1234567", None, 1]
+    assert [query in compact for query in queries[:-2]] == [query in keys for query in queries[:-2]]
+    assert None not in compact and 1 not in compact
+    assert list(compact.isin(queries)) == [query in compact for query in queries]
+    # 重复授权公告号以最后一条为准
+    assert compact.get("CN100000B")["申请人"] == "丙公司"
+    assert compact["CN000123A"]["申请人"] == "123"
+    assert compact.get("CN999999B") is None
+    assert compact.nbytes < 40 * len(compact)
+
+
+def test_compact_key_set_survives_pickle(tmp_path):
+    json_path = tmp_path / "auth.json"
+    write_json(json_path, RECORDS)
+    compact = load_authorization_keys(str(json_path), compact=True, bloom_bits_per_key=8)
+
+    restored = pickle.loads(pickle.dumps(compact))
+    assert sorted(restored) == ["CN100000B", "CN100001B", "CN1234567U"]
+    assert "CN1234567U" in restored
+    assert "CN999999B" not in restored
+    assert restored.get("CN100001B")["申请人"] == "乙公司"
+
+
+def test_compact_key_set_in_spawned_process(tmp_path):
+    json_path = tmp_path / "auth.json"
+    write_json(json_path, RECORDS)
+    compact = load_authorization_keys(str(json_path), compact=True)
+
+    # 新解释器的字符串哈希种子不同，反序列化时重新排序
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        assert executor.submit(operator.contains, compact, "CN1234567U").result()
+        assert not executor.submit(operator.contains, compact, "CN999999B").result()
+
+
+def test_compact_key_set_dedupes_repeated_keys_linearly(tmp_path):
+    json_path = tmp_path / "auth.json"
+    write_json(json_path, [{"授权公告号": "", "申请人": str(i)} for i in range(20000)] + RECORDS)
+
+    compact = load_authorization_keys(str(json_path), compact=True)
+    assert len(compact) == 4
+    assert compact.get("")["申请人"] == "19999"
+    assert compact.get("CN100000B")["申请人"] == "丙公司"
+
+
+def test_empty_compact_key_set():
+    compact = CompactKeySet()
+    assert len(compact) == 0
+    assert "CN100000B" not in compact
+    assert list(compact.isin(["CN100000B"])) == [False]
+
+
+def test_open_auth_index_falls_back_to_compact_keys(tmp_path, monkeypatch):
+    json_path = tmp_path / "auth.json"
+    write_json(json_path, RECORDS)
+
+    def read_only(*args, **kwargs):
+        raise PermissionError("read-only")
+
+    monkeypatch.setattr(auth_index, "compile_auth_index", read_only)
+    index = open_auth_index(str(json_path))
+    assert isinstance(index, CompactKeySet)
+    assert "CN100001B" in index
+    assert "CN999999B" not in index
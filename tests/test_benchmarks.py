@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+
+from benchmarks.generator import generate_auth_json, generate_parts, generate_rows
+from benchmarks.stages import RssSampler, current_rss_kb, run_scale
+from patent_checker.auth_index import open_auth_index
+
+
+def test_generator_is_deterministic(tmp_path):
+    assert generate_rows(50, 20, seed=3) == generate_rows(50, 20, seed=3)
+    first = [open(path, 'rb').read() for path in generate_parts(tmp_path / "a", 3, 40, 20, seed=1)]
+    second = [open(path, 'rb').read() for path in generate_parts(tmp_path / "b", 3, 40, 20, seed=1)]
+    assert first == second
+
+
+def test_generator_hit_rate(tmp_path):
+    json_path = str(tmp_path / "auth.json")
+    generate_auth_json(json_path, 100)
+    auth_index = open_auth_index(json_path)
+    numbers = [row[4] for row in generate_rows(1000, 100, hit_rate=0.5) if row[4]]
+    assert 0.4 < sum(number in auth_index for number in numbers) / len(numbers) < 0.6
+
+
+def test_run_scale_records_every_stage():
+    records = run_scale(100, 50, 3, 0.2, 0.9, 0.05, 0, None)
+    assert [record["stage"] for record in records] == [
+        "generate", "load_auth_json", "compile_index", "open_index", "write_split",
+        "parse", "existence", "cross_validate", "validate_files", "single_check",
+    ]
+    assert all(record["seconds"] >= 0 for record in records)
+
+
+def test_stage_rss_is_measured_per_stage():
+    if current_rss_kb() is None:
+        pytest.skip("不支持读取当前常驻内存")
+    with RssSampler(interval=0.001) as sampler:
+        block = b"x" * (64 * 1024 * 1024)
+        time.sleep(0.05)
+        del block
+    # 阶段结束后内存已释放，但阶段内的峰值被采到
+    assert sampler.delta_kb >= 32 * 1024
+    with RssSampler() as sampler:
+        pass
+    assert sampler.delta_kb < 32 * 1024
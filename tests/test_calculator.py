@@ -1,3 +1,4 @@
+import pandas as pd
 import pytest
 from salary_calculator.calculator import InternSalaryCalculator
 
@@ -25,4 +26,29 @@ def test_negative_hours():
 def test_piecework_wage():
     calc = InternSalaryCalculator()
     assert calc.calculate_piecework_wage([(10, 5)]) == 50
-    assert calc.calculate_piecework_wage([(5, 10), (3, 20)]) == 110
\ No newline at end of file
+    assert calc.calculate_piecework_wage([(5, 10), (3, 20)]) == 110
+
+def test_calculate_payroll_matches_single_calculation():
+    calc = InternSalaryCalculator()
+    tasks = pd.DataFrame([["张三", "B", "40", "50", "3"], ["李四", "A", "30", "", ""], ["张三", "B", "40", "30", "5"]],
+                         columns=["name", "level", "hours", "quantity", "rate"])
+    payroll = calc.calculate_payroll(tasks).set_index("name")
+    assert list(payroll.index) == ["张三", "李四"]
+    assert payroll.loc["张三", "total"] == calc.calculate_total_salary("B", 40, [(50, 3), (30, 5)])
+    assert payroll.loc["李四", "total"] == calc.calculate_total_salary("A", 30, [])
+    assert payroll.loc["张三", "piece_tasks"] == 2
+
+
+def test_calculate_payroll_collects_all_errors():
+    calc = InternSalaryCalculator()
+    tasks = pd.DataFrame([["张三", "B", "40", "5", ""], ["", "A", "x", "", ""], ["张三", "C", "40", "", ""]],
+                         columns=["name", "level", "hours", "quantity", "rate"])
+    with pytest.raises(ValueError) as excinfo:
+        calc.calculate_payroll(tasks)
+    assert [(row, message) for row, _, message in excinfo.value.args[1]] == [
+        (2, "计件单价不是数字："),
+        (2, "职级或工时与同名的其他行不一致"),
+        (3, "姓名为空"),
+        (3, "工时不是数字：x"),
+        (4, "职级或工时与同名的其他行不一致"),
+    ]
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import os
+
+import pytest
+
+from patent_checker import checker
+from patent_checker.auth_index import load_authorization_keys
+from patent_checker.normalizer import open_publication_number_index
+
+from .conftest import write_csv
+
+
+def rates(result):
+    return result["avg_existence_rate"], result["avg_consistency_rate"]
+
+
+def test_validate_files(part_files, auth_json):
+    result = checker.validate_files(part_files, check_gap=0.5, auth_dict_path=auth_json)
+    # 存在率: 2/4, 2/4, 2/4；一致率: 1/2, 1/1, 1/2
+    assert result["avg_existence_rate"] == pytest.approx(0.5)
+    assert result["avg_consistency_rate"] == pytest.approx(2 / 3)
+
+
+def test_validate_files_parses_each_file_once(part_files, auth_json, monkeypatch):
+    calls = []
+    original = checker.read_csv_columns
+
+    def counting_read(file_path, limit=None):
+        if limit is None:
+            calls.append(file_path)
+        return original(file_path, limit)
+
+    monkeypatch.setattr(checker, "read_csv_columns", counting_read)
+    checker.validate_files(part_files, check_gap=0.5, auth_dict_path=auth_json)
+    assert sorted(calls) == sorted(part_files)
+
+
+def as_list(values):
+    """启用列式缓存时读出的是Arrow列"""
+    return values.to_pylist() if hasattr(values, "to_pylist") else list(values)
+
+
+def test_read_csv_columns_matches_dict_reader(tmp_path):
+    path = tmp_path / "part.csv"
+    path.write_text("extra,have_patent_fixed,name\n"
+                    "e,1,a\n"
+                    "\n"
+                    "e,0\n"
+                    "e,1,c,overflow\n", encoding='utf-8-sig')
+    rows = checker.read_csv_rows(str(path))
+    total, columns = checker.read_csv_columns(str(path))
+    columns = {column: as_list(values) for column, values in columns.items()}
+    assert total == len(rows) == 3
+    assert columns == {"name": [row["name"] for row in rows],
+                       "have_patent_fixed": [row["have_patent_fixed"] for row in rows]}
+    assert columns["name"] == ["a", None, "c"]
+    total, head = checker.read_csv_head_columns(str(path), 0.5)
+    assert (total, {column: as_list(values) for column, values in head.items()}) == \
+        (3, {"name": ["a", None], "have_patent_fixed": ["1", "0"]})
+
+
+def test_read_csv_head(tmp_path):
+    path = write_csv(tmp_path / "part.csv", [[str(i), "0", ""] for i in range(7)])
+    total, head = checker.read_csv_head(path, 0.2)
+    assert total == 7
+    assert [row["name"] for row in head] == ["0", "1"]
+
+
+def test_validate_files_with_workers_matches_sequential(part_files, auth_json, caplog):
+    caplog.set_level(logging.INFO)
+    sequential = checker.validate_files(part_files, check_gap=0.5, auth_dict_path=auth_json)
+    caplog.clear()
+    parallel = checker.validate_files(part_files, check_gap=0.5, auth_dict_path=auth_json, workers=3)
+    assert rates(parallel) == rates(sequential)
+    processed = [r.getMessage() for r in caplog.records if r.getMessage().startswith("处理文件")]
+    assert processed == [f"处理文件 [{i}/3]: {path}" for i, path in enumerate(part_files, 1)]
+
+
+@pytest.mark.parametrize("tolerant", [False, True])
+def test_validate_files_with_workers_and_plain_dict(part_files, auth_json, tolerant):
+    # 没有索引路径和json路径的授权号字典也要传到工作进程中
+    auth_dict = checker.create_authorization_dict(auth_json)
+    if tolerant:
+        auth_dict = open_publication_number_index(auth_json, auth_dict)
+    sequential = checker.validate_files(part_files, check_gap=0.5, auth_dict=auth_dict)
+    assert sequential["avg_existence_rate"] == pytest.approx(0.5)
+    assert rates(checker.validate_files(part_files, check_gap=0.5, auth_dict=auth_dict, workers=2)) == \
+        rates(sequential)
+
+
+def test_count_existence_looks_up_each_file_once(auth_json, monkeypatch):
+    index = load_authorization_keys(auth_json, compact=True)
+    calls = []
+    isin = index.isin
+    monkeypatch.setattr(index, "isin", lambda values: calls.append(values) or isin(values))
+    monkeypatch.setattr(type(index), "__contains__", lambda self, key: pytest.fail("逐行查找"))
+
+    columns = {"patent_publication_number": ["CN1B", "X", "", None, "CN2B"]}
+    assert checker.count_existence(columns, index) == (2, ["X"])
+    assert len(calls) == 1
+
+
+def test_validate_files_with_compact_keys(part_files, auth_json):
+    sequential = checker.validate_files(part_files, check_gap=0.5, auth_dict_path=auth_json)
+    compact = load_authorization_keys(auth_json, compact=True, bloom_bits_per_key=10)
+    # 工作进程直接使用主进程中的紧凑集合，不再读取源JSON
+    os.remove(auth_json)
+    assert rates(checker.validate_files(part_files, check_gap=0.5, auth_dict=compact)) == rates(sequential)
+    assert rates(checker.validate_files(part_files, check_gap=0.5, auth_dict=compact, workers=2)) == rates(sequential)
+
+
+def test_validate_files_reuses_cached_results(part_files, auth_json, tmp_path, monkeypatch):
+    cache_path = str(tmp_path / "validation_cache.json")
+    first = checker.validate_files(part_files, check_gap=0.5, auth_dict_path=auth_json, cache_path=cache_path)
+
+    checked = []
+    original = checker._check_file
+
+    def recording_check(index, *args, **kwargs):
+        checked.append(index)
+        return original(index, *args, **kwargs)
+
+    monkeypatch.setattr(checker, "_check_file", recording_check)
+    second = checker.validate_files(part_files, check_gap=0.5, auth_dict_path=auth_json, cache_path=cache_path)
+    assert rates(second) == rates(first)
+    assert checked == []
+    assert second["metrics"]["run"]["cache_hits"] == 3
+
+    # 修改第3个文件后只需重新验证它和以它为重叠来源的第2个文件
+    write_csv(part_files[2], [["e", "1", "CN1B"], ["f", "0", "CN2B"], ["a", "1", "CN2B"], ["b", "1", "X"]])
+    result = checker.validate_files(part_files, check_gap=0.5, auth_dict_path=auth_json, cache_path=cache_path)
+    assert checked == [1, 2]
+    monkeypatch.undo()
+    assert rates(result) == rates(checker.validate_files(part_files, check_gap=0.5, auth_dict_path=auth_json))
+
+
+def test_result_cache_prunes_stale_and_failed_results(part_files, auth_json, tmp_path):
+    cache_path = str(tmp_path / "validation_cache.json")
+    checker.validate_files(part_files, check_gap=0.5, auth_dict_path=auth_json, cache_path=cache_path)
+    checker.validate_files(part_files, check_gap=0.2, auth_dict_path=auth_json, cache_path=cache_path)
+    with open(cache_path, encoding='utf-8') as file:
+        data = json.load(file)
+    # 旧 check_gap 的结果已淘汰
+    assert len(data["results"]) == 3
+    assert sorted(data["fingerprints"]) == sorted(part_files)
+
+    with open(part_files[1], 'wb') as file:
+        file.write(b"name,have_patent_fixed\n\xff\xfe\n")
+    result = checker.validate_files(part_files, check_gap=0.2, auth_dict_path=auth_json, cache_path=cache_path)
+    assert result["metrics"]["run"]["processed_files"] < 3
+    # 读取失败的文件不进入缓存，下次运行重新验证
+    with open(cache_path, encoding='utf-8') as file:
+        cached = json.load(file)["results"].values()
+    assert 0 < len(cached) < 3
+    assert all(r["processed"] for r in cached)
+
+
+def test_validate_files_resumes_from_journal(part_files, auth_json, tmp_path, monkeypatch):
+    journal_path = str(tmp_path / "run.journal")
+    expected = checker.validate_files(part_files, check_gap=0.5, auth_dict_path=auth_json)
+
+    checked = []
+    original = checker._check_file
+
+    def interrupted_check(index, *args, **kwargs):
+        checked.append(index)
+        if index == 2 and len(checked) == 3:
+            raise KeyboardInterrupt
+        return original(index, *args, **kwargs)
+
+    journals = []
+    journal_class = checker.RunJournal
+    monkeypatch.setattr(checker, "RunJournal", lambda *args: journals.append(journal_class(*args)) or journals[-1])
+    monkeypatch.setattr(checker, "_check_file", interrupted_check)
+    with pytest.raises(KeyboardInterrupt):
+        checker.validate_files(part_files, check_gap=0.5, auth_dict_path=auth_json, journal_path=journal_path)
+    # 中断时运行日志同样被关闭
+    assert journals[0]._file is None
+
+    # 模拟写入中途被终止留下的不完整记录
+    with open(journal_path, 'ab') as f:
+        f.write(b'{"type": "file", "ind')
+
+    result = checker.validate_files(part_files, check_gap=0.5, auth_dict_path=auth_json,
+                                    journal_path=journal_path, resume=True)
+    assert checked == [0, 1, 2, 2]
+    assert rates(result) == rates(expected)
+    assert result["metrics"]["run"]["resumed_files"] == 2
+    assert len(open(journal_path, encoding='utf-8').read().splitlines()) == 4
+
+    # 参数变化时不复用日志
+    checker.validate_files(part_files, check_gap=0.25, auth_dict_path=auth_json,
+                           journal_path=journal_path, resume=True)
+    assert checked[4:] == [0, 1, 2]
+
+
+def test_validate_files_resume_retries_failed_files(part_files, auth_json, tmp_path, monkeypatch):
+    journal_path = str(tmp_path / "run.journal")
+    original = checker.read_csv_columns
+
+    def out_of_memory(file_path, limit=None):
+        if file_path == part_files[1] and limit is None:
+            raise MemoryError
+        return original(file_path, limit)
+
+    monkeypatch.setattr(checker, "read_csv_columns", out_of_memory)
+    first = checker.validate_files(part_files, check_gap=0.5, auth_dict_path=auth_json, journal_path=journal_path)
+    assert [counts["processed"] for counts in first["files"]] == [True, False, True]
+
+    monkeypatch.undo()
+    result = checker.validate_files(part_files, check_gap=0.5, auth_dict_path=auth_json,
+                                    journal_path=journal_path, resume=True)
+    assert [counts["processed"] for counts in result["files"]] == [True, True, True]
+    assert result["metrics"]["run"]["resumed_files"] == 2
+    assert result["files"][1] == checker.validate_files(part_files, check_gap=0.5, auth_dict_path=auth_json)["files"][1]
+
+
+def test_validate_files_metrics(part_files, auth_json, tmp_path):
+    metrics_path = tmp_path / "metrics.jsonl"
+    result = checker.validate_files(part_files, check_gap=0.5, auth_dict_path=auth_json,
+                                    metrics_path=str(metrics_path))
+    files = result["metrics"]["files"]
+    assert [m["file"] for m in files] == part_files
+    # 顺序模式下每个文件只解析一次，最后一个文件复用第一个文件的开头部分
+    assert sum(m["rows_parsed"] for m in files) == 12
+    assert all(m["cache_hit"] is False and m["total_seconds"] >= m["lookup_seconds"] for m in files)
+
+    lines = [json.loads(line) for line in metrics_path.read_text(encoding='utf-8').splitlines()]
+    assert [line["type"] for line in lines] == ["run", "file", "file", "file"]
+    assert lines[0]["processed_files"] == 3
+
+    prom_path = tmp_path / "metrics.prom"
+    checker.validate_files(part_files, check_gap=0.5, auth_dict_path=auth_json, metrics_path=str(prom_path))
+    assert 'patent_validation_files{state="processed"} 3' in prom_path.read_text(encoding='utf-8')
+
+
+def test_validate_files_mismatch_table(part_files, auth_json):
+    result = checker.validate_files(part_files, check_gap=0.5, auth_dict_path=auth_json)
+    assert [(row["file"], row["name"], row["current"], row["next"]) for row in result["mismatches"]] == [
+        (part_files[0], "d", "0", "1"),
+        (part_files[2], "b", "1", "0"),
+    ]
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import csv
+import os
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from patent_checker import checker, columnar_cache, single_checker  # noqa: E402
+from patent_checker.splitter import count_rows  # noqa: E402
+
+ROWS = [
+    ["甲公司", "1", "CN1B", "甲有限公司", "1", "备注"],
+    [],
+    ["乙公司", "0", "", "", "0", "多行\n备注"],
+    ["丙公司", "1", "CN9B", "丙有限公司", "1"],
+]
+
+
+@pytest.fixture
+def csv_path(tmp_path, monkeypatch):
+    monkeypatch.setenv(columnar_cache.CACHE_ENV, "1")
+    path = tmp_path / "part_1.csv"
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(columnar_cache.COLUMNS + ["remark"])
+        writer.writerows(ROWS)
+    return str(path)
+
+
+def test_checker_reads_from_sidecar(csv_path, monkeypatch):
+    rows = checker.read_csv_rows(csv_path)
+    assert os.path.exists(columnar_cache.sidecar_path(csv_path))
+
+    monkeypatch.delenv(columnar_cache.CACHE_ENV)
+    expected = [{column: row[column] for column in columnar_cache.COLUMNS} for row in checker.read_csv_rows(csv_path)]
+    assert rows == expected
+    monkeypatch.setenv(columnar_cache.CACHE_ENV, "1")
+    assert checker.read_csv_head(csv_path, 0.5) == (3, expected[:2])
+
+
+def test_single_checker_reads_from_sidecar(csv_path, monkeypatch):
+    auth_dict = {"CN1B": {}}
+    cached = single_checker.process_csv_file(csv_path, auth_dict=auth_dict)
+
+    monkeypatch.delenv(columnar_cache.CACHE_ENV)
+    assert cached == single_checker.process_csv_file(csv_path, auth_dict=auth_dict)
+
+
+def test_splitter_does_not_build_sidecar(csv_path):
+    # 分割的原始数据只流式计数，不为它生成（需要整列读入内存的）旁路文件
+    assert count_rows(csv_path) == 4
+    assert not os.path.exists(columnar_cache.sidecar_path(csv_path))
+
+
+def test_sidecar_rebuilt_when_source_changes(csv_path):
+    assert len(checker.read_csv_rows(csv_path)) == 3
+    with open(csv_path, 'a', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerow(["丁公司", "1", "CN2B", "丁有限公司", "1", ""])
+    os.utime(csv_path, ns=(0, 10 ** 9))
+    assert len(checker.read_csv_rows(csv_path)) == 4
+
+
+def test_unwritable_sidecar_falls_back_to_csv(csv_path, monkeypatch):
+    def read_only(*args, **kwargs):
+        raise PermissionError("只读目录")
+
+    monkeypatch.setattr(pa, "OSFile", read_only)
+    assert columnar_cache.load_table(csv_path) is None
+    assert not os.path.exists(columnar_cache.sidecar_path(csv_path))
+    cached = single_checker.process_csv_file(csv_path, auth_dict={"CN1B": {}})
+    assert len(checker.read_csv_rows(csv_path)) == 3
+    assert checker.validate_files([csv_path], check_gap=0.5, auth_dict={"CN1B": {}}) is not None
+
+    monkeypatch.delenv(columnar_cache.CACHE_ENV)
+    assert cached == single_checker.process_csv_file(csv_path, auth_dict={"CN1B": {}})
+
+
+def test_sidecar_takes_last_duplicate_header(tmp_path, monkeypatch):
+    path = tmp_path / "part_1.csv"
+    path.write_text("name,have_patent_fixed,name\n甲公司,1,甲有限公司\n乙公司,0\n", encoding='utf-8-sig')
+    expected = checker.read_csv_rows(str(path))
+
+    monkeypatch.setenv(columnar_cache.CACHE_ENV, "1")
+    assert checker.read_csv_rows(str(path)) == expected
+    assert [row["name"] for row in expected] == ["甲有限公司", None]
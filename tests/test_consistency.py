@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+import pytest
+
+from patent_checker import checker
+from patent_checker.consistency import overlap_join
+
+
+def rows(*pairs):
+    return [{"name": name, "have_patent_fixed": value} for name, value in pairs]
+
+
+def test_overlap_join_reports_every_mismatch():
+    current = rows(("a", "1"), ("b", "0"), ("c", "1"), ("d", "0"), ("x", "1"))
+    overlap = rows(("a", "1"), ("b", "1"), ("c", "0"), ("d", "0"))
+
+    joined = overlap_join(current, overlap)
+    assert (joined["valid_count"], joined["match_count"]) == (2, 4)
+    assert joined["mismatches"] == [
+        {"row": 2, "name": "b", "current": "0", "next": "1"},
+        {"row": 3, "name": "c", "current": "1", "next": "0"},
+    ]
+    assert joined["conflicting_names"] == []
+    # 旧实现在出现第一个一致项后不再记录不一致名称
+    assert checker.cross_validate(current, overlap) == (2, 4, ["b", "c"])
+
+
+def test_overlap_join_duplicate_policies():
+    current = rows(("a", "1"), ("b", "0"))
+    overlap = rows(("a", "0"), ("b", "0"), ("a", "1"), ("b", "0"))
+
+    last = overlap_join(current, overlap)
+    assert (last["valid_count"], last["match_count"], last["conflicting_names"]) == (2, 2, ["a"])
+
+    first = overlap_join(current, overlap, duplicates="first")
+    assert (first["valid_count"], first["match_count"]) == (1, 2)
+    assert first["mismatches"] == [{"row": 1, "name": "a", "current": "1", "next": "0"}]
+
+    skip = overlap_join(current, overlap, duplicates="skip")
+    assert (skip["valid_count"], skip["match_count"], skip["mismatches"]) == (1, 1, [])
+
+    with pytest.raises(ValueError):
+        overlap_join(current, overlap, duplicates="newest")
+
+
+def test_overlap_join_columnar_input():
+    current = pd.DataFrame({"name": ["a", "b", "c"], "have_patent_fixed": ["1", "0", "1"]})
+    overlap = {"name": ["c", "b"], "have_patent_fixed": ["0", "0"]}
+
+    joined = overlap_join(current, overlap)
+    assert (joined["valid_count"], joined["match_count"]) == (1, 2)
+    assert [row["name"] for row in joined["mismatches"]] == ["c"]
+
+
+def test_overlap_join_missing_column():
+    with pytest.raises(KeyError):
+        overlap_join([{"name": "a"}], rows(("a", "1")))
+
+
+def test_overlap_join_empty():
+    joined = overlap_join([], rows(("a", "1")))
+    assert (joined["valid_count"], joined["match_count"], joined["mismatches"]) == (0, 0, [])
+
+
+@pytest.mark.parametrize("duplicates", ["last", "first", "skip"])
+def test_overlap_join_arrow_columns_match_rows(duplicates):
+    pa = pytest.importorskip("pyarrow")
+    current = rows(("a", "1"), ("b", "0"), (None, None), ("c", None), ("x", "1"), ("d", "0"))
+    overlap = rows(("a", "0"), ("b", "0"), ("a", "1"), (None, None), ("c", "1"), ("d", "0"))
+
+    def arrow(table):
+        return {column: pa.chunked_array([pa.array([row[column] for row in table], type=pa.string())])
+                for column in ("name", "have_patent_fixed")}
+
+    assert overlap_join(arrow(current), arrow(overlap), duplicates) == overlap_join(current, overlap, duplicates)
+    unique = overlap[1:]
+    assert overlap_join(arrow(current), arrow(unique), duplicates) == overlap_join(current, unique, duplicates)
+    assert overlap_join(arrow([]), arrow(overlap), duplicates)["match_count"] == 0
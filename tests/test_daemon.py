@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from patent_checker import daemon
+
+
+@pytest.fixture
+def server(auth_json):
+    json_path = Path(auth_json)
+    server = daemon.create_server(auth_json, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, json_path
+    server.shutdown()
+    server.server_close()
+
+
+def server_url(server):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def test_lookup_and_reload(server):
+    server, json_path = server
+    url = server_url(server)
+    assert daemon.lookup(["CN1B", "CN3B", ""], url) == [True, False, False]
+
+    json_path.write_text(json.dumps([{"授权公告号": "CN3B"}]), encoding='utf-8')
+    os.utime(json_path, ns=(0, 10 ** 9))
+    assert daemon.lookup(["CN1B", "CN3B"], url) == [False, True]
+
+
+def test_check_csv(server, tmp_path):
+    server, _ = server
+    csv_path = tmp_path / "submitted.csv"
+    pd.DataFrame({
+        "now_name": ["甲公司", None],
+        "patent_fixed": [1, 0],
+        "patent_publication_number": ["CN1B", "CN9B"],
+    }).to_csv(csv_path, index=False)
+    assert daemon.check_csv(str(csv_path), server_url(server)) == (1, 1, 2, 1)
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# 在新的子进程中冷启动导入，计入numpy/pandas/pyarrow等第三方依赖的开销：checker与splitter不应加载它们。
+# single_checker 本身基于pandas，只检查它没有导入副作用，不计时
+IMPORT_PROBE = """
+import builtins, io, logging, os, sys, time
+
+opened = []
+original_open = builtins.open
+def recording_open(file, *args, **kwargs):
+    opened.append(str(file))
+    return original_open(file, *args, **kwargs)
+builtins.open = io.open = recording_open
+
+handlers_before = len(logging.getLogger().handlers)
+start = time.perf_counter()
+import patent_checker.checker
+import patent_checker.splitter
+elapsed = time.perf_counter() - start
+heavy = sorted(name for name in ("numpy", "pandas", "pyarrow") if name in sys.modules)
+# pandas导入时会读取时区数据，不计入本项目模块的I/O
+builtins.open = io.open = original_open
+import pandas
+builtins.open = io.open = recording_open
+import patent_checker.single_checker
+builtins.open = io.open = original_open
+
+print(elapsed)
+print(heavy)
+print(len(logging.getLogger().handlers) - handlers_before)
+print(opened)
+print(sorted(os.listdir('.')))
+"""
+
+
+def test_import_has_no_side_effects(tmp_path):
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE],
+        cwd=tmp_path, env={"PYTHONPATH": str(ROOT_DIR)},
+        capture_output=True, text=True, check=True,
+    )
+    elapsed, heavy, added_handlers, opened, created = result.stdout.splitlines()
+    assert float(elapsed) < 0.2
+    assert heavy == "[]"
+    assert added_handlers == "0"
+    assert opened == "[]"
+    assert created == "[]"
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import csv
+import json
+
+import pytest
+
+from patent_checker import checker
+from patent_checker.normalizer import (
+    MATCH_EXACT, MATCH_KIND_CODE, MATCH_NORMALIZED, normalize_publication_number, open_publication_number_index,
+    strip_kind_code,
+)
+
+
+@pytest.fixture
+def auth_json(tmp_path):
+    json_path = tmp_path / "专利申请人.json"
+    records = [{"授权公告号": "CN100000B", "申请人": "甲公司"}, {"授权公告号": "CN1234567U", "申请人": "乙公司"}]
+    json_path.write_text(json.dumps(records, ensure_ascii=False), encoding='utf-8')
+    return str(json_path)
+
+
+def test_normalize_publication_number():
+    assert normalize_publication_number(" cn 100000 b ") == "CN100000B"
+    assert normalize_publication_number("ＣＮ１０００００Ｂ") == "CN100000B"
+    assert normalize_publication_number(None) == ""
+    assert strip_kind_code("CN100000B1") == "CN100000"
+    assert strip_kind_code("cn100000a") == "CN100000"
+    assert strip_kind_code("CN100000") == "CN100000"
+
+
+def test_match_tiers(auth_json):
+    index = open_publication_number_index(auth_json)
+    assert index.match("CN100000B") == MATCH_EXACT
+    assert index.match("cn 100000b") == MATCH_NORMALIZED
+    assert index.match("ＣＮ１０００００Ｂ") == MATCH_NORMALIZED
+    assert index.match("CN100000A") == MATCH_KIND_CODE
+    assert index.match("CN1234567") == MATCH_KIND_CODE
+    assert index.match("CN999999B") is None
+    assert "CN999999B" not in index
+
+    assert index.resolve("cn100000a") == (MATCH_KIND_CODE, {"授权公告号": "CN100000B", "申请人": "甲公司"})
+    assert index.resolve("CN999999B") == (None, None)
+
+
+def test_validate_files_tolerant(tmp_path, auth_json):
+    files = []
+    for part, numbers in enumerate([["CN100000B", "cn 100000b"], ["CN1234567", "X"]], start=1):
+        path = tmp_path / f"part_{part}.csv"
+        with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "have_patent_fixed", "patent_publication_number"])
+            writer.writerows([[f"n{part}{i}", "1", number] for i, number in enumerate(numbers)])
+        files.append(str(path))
+
+    strict = checker.validate_files(files, check_gap=0.5, auth_dict_path=auth_json)
+    tolerant = checker.validate_files(files, check_gap=0.5, auth_dict_path=auth_json, tolerant=True)
+    assert strict["avg_existence_rate"] == pytest.approx(0.25)
+    assert tolerant["avg_existence_rate"] == pytest.approx(0.75)
+
+    rows = [{"patent_publication_number": number} for number in ["CN100000B", "cn100000b", "CN100000A", "X"]]
+    tier_counts = {}
+    exist_count, missing = checker.count_existence(rows, open_publication_number_index(auth_json),
+                                                   tier_counts=tier_counts)
+    assert (exist_count, missing) == (3, ["X"])
+    assert tier_counts == {MATCH_EXACT: 1, MATCH_NORMALIZED: 1, MATCH_KIND_CODE: 1}
+
+
+def test_validate_files_tolerant_workers(tmp_path, auth_json):
+    files = []
+    for part in range(1, 4):
+        path = tmp_path / f"part_{part}.csv"
+        with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "have_patent_fixed", "patent_publication_number"])
+            writer.writerows([["a", "1", "cn100000b"], ["b", "1", "CN999B"]])
+        files.append(str(path))
+
+    sequential = checker.validate_files(files, check_gap=0.5, auth_dict_path=auth_json, tolerant=True)
+    parallel = checker.validate_files(files, check_gap=0.5, auth_dict_path=auth_json, tolerant=True, workers=2)
+    assert sequential["avg_existence_rate"] == pytest.approx(0.5)
+    assert parallel["avg_existence_rate"] == sequential["avg_existence_rate"]
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+import csv
+import json
+import os
+
+import pytest
+from typer.testing import CliRunner
+
+from patent_checker import checker
+from patent_checker.splitter import split_csv, split_dir
+from salary_calculator.__main__ import app
+from salary_calculator.calculator import InternSalaryCalculator
+from salary_calculator.piecework import build_piece_tasks, calculate_piecework_payroll, piece_quantity
+
+from .conftest import write_csv
+
+
+def split_master(tmp_path, rows, n, check_gap):
+    master = write_csv(tmp_path / "master.csv", rows)
+    split_csv(master, n, check_gap)
+    return [os.path.join(split_dir(master), f"part_{i}.csv") for i in range(1, n + 1)]
+
+
+@pytest.fixture
+def batch(tmp_path, auth_json):
+    # 每块2行，末尾追加下一块开头的1行重叠行
+    csv_files = split_master(tmp_path, [["a", "1", "CN1B"], ["b", "0", "X"], ["c", "1", "CN2B"], ["d", "0", ""],
+                                        ["e", "0", "CN1B"], ["f", "0", "Z"]], 3, 0.5)
+    # 第2个文件的标注员改动了c，与第1个文件末尾的重叠行不一致
+    write_csv(csv_files[1], [["c", "0", "CN2B"], ["d", "0", ""], ["e", "0", "CN1B"]])
+    assignments = [
+        {"file": csv_files[0], "annotator": "张三", "level": "A", "hours": "10"},
+        {"file": csv_files[1], "annotator": "李四", "level": "B", "hours": "8"},
+        {"file": csv_files[2], "annotator": "张三", "level": "A", "hours": "10"},
+    ]
+    return csv_files, auth_json, assignments
+
+
+def test_piece_quantity_weighting():
+    # 10行中有2行是复制自下一个文件的重叠行，只计入下一个文件
+    counts = {"processed": True, "rows": 10, "match_count": 7, "existence_rate": 0.5, "consistency_rate": 0.75}
+    assert piece_quantity(counts, overlap_rows=2) == 8
+    assert piece_quantity(counts, "existence", 2) == 4
+    assert piece_quantity(counts, "consistency", 2) == 6
+    assert piece_quantity(counts, "combined", 2) == 3
+    assert piece_quantity({"processed": False}, "combined") == 0
+    with pytest.raises(ValueError):
+        piece_quantity(counts, "speed")
+
+
+def test_calculate_piecework_payroll(batch):
+    csv_files, auth_json, assignments = batch
+    result = checker.validate_files(csv_files, check_gap=0.5, auth_dict_path=auth_json)
+    # 每个文件3行，其中1行为重叠行；一致率: 0/1, 1/1, 1/1
+    payroll = calculate_piecework_payroll(InternSalaryCalculator(), result, assignments, 0.5,
+                                          "consistency", check_gap=0.5).set_index("name")
+    assert payroll.loc["张三", "piece_tasks"] == 2
+    assert payroll.loc["张三", "piece_wage"] == (0 + 2) * 0.5
+    assert payroll.loc["张三", "total"] == 200 + 1.0
+    assert payroll.loc["李四", "piece_wage"] == 2 * 0.5
+
+
+def test_piece_quantity_ignores_repeated_names(tmp_path):
+    auth_json = tmp_path / "专利申请人.json"
+    auth_json.write_text(json.dumps([{"授权公告号": "CN1B"}]), encoding='utf-8')
+    csv_files = split_master(tmp_path, [["ACME", "1", "CN1B"]] * 30, 3, 0.2)
+    result = checker.validate_files(csv_files, check_gap=0.2, auth_dict_path=str(auth_json))
+    # 名称全部相同，按名称匹配的行数为12，但每个文件末尾只有2行重叠行
+    assert [counts["match_count"] for counts in result["files"]] == [12, 12, 12]
+    assignments = [{"file": path, "annotator": "张三", "level": "A", "hours": "0"} for path in csv_files]
+    tasks = build_piece_tasks(result, assignments, 1, check_gap=0.2)
+    assert tasks["quantity"].tolist() == [10.0, 10.0, 10.0]
+
+    # 交叉验证失败（match_count 为0）时重叠行也不重复计件
+    for counts in result["files"]:
+        counts["match_count"] = 0
+    assert build_piece_tasks(result, assignments, 1, check_gap=0.2)["quantity"].tolist() == [10.0, 10.0, 10.0]
+
+
+def test_build_piece_tasks_rejects_files_not_from_split(batch):
+    csv_files, auth_json, assignments = batch
+    with open(csv_files[1], 'a', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerow(["g", "0", "X"])
+    result = checker.validate_files(csv_files, check_gap=0.5, auth_dict_path=auth_json)
+    with pytest.raises(ValueError):
+        build_piece_tasks(result, assignments, 1, check_gap=0.5)
+
+
+def write_assignments(path, assignments):
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.DictWriter(f, fieldnames=["file", "annotator", "level", "hours"])
+        writer.writeheader()
+        writer.writerows(assignments)
+    return str(path)
+
+
+def test_piecework_command(batch, tmp_path, monkeypatch):
+    monkeypatch.setattr(checker, "setup_logging", lambda: None)
+    _, auth_json, assignments = batch
+    assignments_csv = write_assignments(tmp_path / "assignments.csv", assignments)
+
+    result = CliRunner().invoke(app, ["piecework", assignments_csv, "--rate", "1", "--auth-dict", auth_json,
+                                      "--check-gap", "0.5", "--quality", "existence"])
+    assert result.exit_code == 0, result.output
+    summary = json.loads((tmp_path / "assignments_payroll.json").read_text(encoding='utf-8'))
+    # 存在率均为2/3：计件数量 3 × 2 × 2/3
+    assert summary["piece_wage"] == pytest.approx(4.0)
+    assert summary["total"] == pytest.approx(200 + 200 + 4.0)
+
+
+def test_piecework_command_reports_missing_files(batch, tmp_path, monkeypatch):
+    monkeypatch.setattr(checker, "setup_logging", lambda: None)
+    _, auth_json, assignments = batch
+    assignments[1] = dict(assignments[1], file=str(tmp_path / "part_9.csv"))
+    assignments_csv = write_assignments(tmp_path / "assignments.csv", assignments)
+
+    result = CliRunner().invoke(app, ["piecework", assignments_csv, "--rate", "1", "--auth-dict", auth_json])
+    assert result.exit_code == 1
+    assert "part_9.csv" in result.output
+    assert not (tmp_path / "assignments_payroll.json").exists()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+import csv
+
+import pytest
+
+from patent_checker.repository import TaskRepository
+from patent_checker.splitter import split_csv
+
+
+@pytest.fixture
+def repo(tmp_path):
+    with TaskRepository(str(tmp_path / "tasks.db"), batch_size=4) as repo:
+        yield repo
+
+
+@pytest.fixture
+def master_csv(tmp_path):
+    path = tmp_path / "data.csv"
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "have_patent_fixed"])
+        writer.writerows([[f"单位{i}", ""] for i in range(10)])
+    return str(path)
+
+
+def annotate(part_path, rows=None):
+    with open(part_path, 'r', encoding='utf-8-sig') as f:
+        data = list(csv.reader(f))
+    with open(part_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(data[0])
+        writer.writerows([name, "1"] for name, _ in (data[1:] if rows is None else data[1:rows + 1]))
+
+
+def test_split_tasks_follow_split_csv(repo, master_csv, tmp_path):
+    first_id, count = repo.import_records("b1", master_csv)
+    assert (first_id, count) == (1, 10)
+    assert repo.get_record(3)["raw"] == {"name": "单位2", "have_patent_fixed": ""}
+
+    task_ids = repo.create_split_tasks("b1", first_id, count, 3, 0.5)
+    # 分块 4/4/2，重叠 2/2/1：第1个任务含记录1-4与5-6，最后一个任务含记录9-10与1-2
+    assert repo.tasks_of_record(5) == [task_ids[0], task_ids[1]]
+    assert repo.tasks_of_record(1) == [task_ids[0], task_ids[2]]
+    assert repo.tasks_of_record(4) == [task_ids[0]]
+
+    split_csv(master_csv, 3, 0.5)
+    part_path = str(tmp_path / "data_split" / "part_1.csv")
+    annotate(part_path)
+    repo.import_task_result(task_ids[0], part_path, fields=["have_patent_fixed"])
+    repo.validate_task(task_ids[0])
+    record = repo.get_record(6)
+    assert record["ann"] == {"have_patent_fixed": "1"} and record["is_validated"]
+    assert not repo.get_record(7)["is_validated"]
+
+
+def test_import_task_result_rejects_wrong_row_count(repo, master_csv, tmp_path):
+    first_id, count = repo.import_records("b1", master_csv)
+    task_ids = repo.create_split_tasks("b1", first_id, count, 2, 0.2)
+    split_csv(master_csv, 2, 0.2)
+    part_path = str(tmp_path / "data_split" / "part_1.csv")
+    annotate(part_path, rows=5)
+
+    with pytest.raises(ValueError):
+        repo.import_task_result(task_ids[0], part_path)
+    assert repo.get_assigner_status(1) == []
+    assert repo.conn.execute("SELECT COUNT(*) FROM task_record_relation WHERE ann IS NOT NULL").fetchone()[0] == 0
+    assert repo.validation_status_per_batch()[0]["finished_tasks"] == 0
+
+
+def test_status_queries(repo, master_csv):
+    first_id, count = repo.import_records("b1", master_csv)
+    b1_tasks = repo.create_split_tasks("b1", first_id, count, 2, 0.2)
+    first_id, count = repo.import_records("b2", master_csv)
+    b2_tasks = repo.create_split_tasks("b2", first_id, count, 2, 0.2)
+
+    alice = repo.register_assigner("alice", "张三")
+    bob = repo.register_assigner("bob")
+    carol = repo.register_assigner("carol")
+    for task_id, assigner_id in zip(b1_tasks + b2_tasks, (alice, alice, bob, alice)):
+        repo.assign_task(task_id, assigner_id)
+    repo.conn.execute("UPDATE data_task SET is_finished = 1 WHERE id = ?", (b1_tasks[0],))
+    repo.validate_task(b1_tasks[0])
+    repo.deactivate_assigner(carol)
+
+    assert repo.unfinished_tasks_per_assigner() == [
+        {"assigner_id": alice, "username": "alice", "unfinished_tasks": 2},
+        {"assigner_id": bob, "username": "bob", "unfinished_tasks": 1},
+    ]
+    assert repo.validation_status_per_batch() == [
+        {"batch": "b1", "tasks": 2, "finished_tasks": 1, "validated_tasks": 1, "validated_task_records": 6},
+        {"batch": "b2", "tasks": 2, "finished_tasks": 0, "validated_tasks": 0, "validated_task_records": 0},
+    ]
+    assert [task["task_id"] for task in repo.get_assigner_status(alice)] == [b1_tasks[0], b1_tasks[1], b2_tasks[1]]
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import csv
+import json
+import random
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from patent_checker import checker
+from patent_checker.shard import merge_partials, shard_files, shard_range, validate_shard
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def batch(tmp_path):
+    rng = random.Random(7)
+    auth_json = tmp_path / "专利申请人.json"
+    auth_json.write_text(json.dumps([{"授权公告号": f"CN{i}B"} for i in range(0, 60, 2)]), encoding='utf-8')
+    csv_files = []
+    for part in range(7):
+        path = tmp_path / f"part_{part}.csv"
+        with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "have_patent_fixed", "patent_publication_number"])
+            for _ in range(rng.randint(5, 12)):
+                writer.writerow([f"n{rng.randrange(20)}", rng.choice("01"), f"CN{rng.randrange(60)}B"])
+        csv_files.append(str(path))
+    return csv_files, str(auth_json)
+
+
+def test_shard_range_covers_all_files():
+    ranges = [shard_range(7, shard, 3) for shard in range(3)]
+    assert ranges == [(0, 2), (2, 4), (4, 7)]
+    assert shard_files(list("abcdefg"), 2, 3) == ["e", "f", "g", "a"]
+    assert shard_files(list("ab"), 0, 3) == []
+    with pytest.raises(ValueError):
+        shard_range(7, 3, 3)
+
+
+def test_shards_in_separate_processes_match_single_node(batch, tmp_path):
+    csv_files, auth_json = batch
+    shards = 3
+    outputs = [str(tmp_path / f"shard_{shard}.json") for shard in range(shards)]
+    nodes = [subprocess.Popen([sys.executable, "-m", "patent_checker.shard", "run", "--shard", str(shard),
+                               "--shards", str(shards), "--output", output, "--check-gap", "0.3",
+                               "--auth-dict", auth_json, *csv_files],
+                              cwd=tmp_path, env={"PYTHONPATH": str(ROOT_DIR)},
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+             for shard, output in enumerate(outputs)]
+    for node in nodes:
+        assert node.wait(timeout=60) == 0, node.stderr.read().decode()
+
+    partials = [json.loads(Path(output).read_text(encoding='utf-8')) for output in outputs]
+    merged = merge_partials(partials)
+    expected = checker.validate_files(csv_files, check_gap=0.3, auth_dict_path=auth_json)
+    assert merged["avg_existence_rate"] == expected["avg_existence_rate"]
+    assert merged["avg_consistency_rate"] == expected["avg_consistency_rate"]
+    assert merged["mismatches"] == expected["mismatches"]
+
+
+def test_merge_rejects_incomplete_shards(batch):
+    csv_files, auth_json = batch
+    partials = [validate_shard(csv_files, shard, 3, 0.3, auth_json) for shard in (0, 2)]
+    with pytest.raises(ValueError):
+        merge_partials(partials)
+    with pytest.raises(ValueError):
+        merge_partials(partials + [validate_shard(csv_files, 1, 3, 0.5, auth_json)])
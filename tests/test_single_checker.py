@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+import pytest
+
+from patent_checker import single_checker
+
+
+@pytest.fixture
+def submitted_csv(tmp_path):
+    path = tmp_path / "submitted.csv"
+    pd.DataFrame({
+        "now_name": ["甲公司", None, "丙公司", "丁公司", "戊公司"],
+        "patent_fixed": [1, 0, 1, None, 1],
+        "patent_publication_number": ["CN1B", None, "CN9B", None, "CN2B"],
+    }).to_csv(path, index=False, encoding="utf-8-sig")
+    return str(path)
+
+
+@pytest.mark.parametrize("chunksize", [1, 2, 100])
+def test_process_csv_file(submitted_csv, chunksize):
+    counts = single_checker.process_csv_file(submitted_csv, chunksize=chunksize, auth_dict={"CN1B": {}, "CN2B": {}})
+    # 缺失值不再被计为存在
+    assert counts == (4, 3, 3, 2)
+
+
+def test_process_csv_file_returns_failing_rows(submitted_csv):
+    *counts, flags = single_checker.process_csv_file(submitted_csv, chunksize=2, return_flags=True,
+                                                     auth_dict={"CN1B": {}, "CN2B": {}})
+    assert tuple(counts) == (4, 3, 3, 2)
+    assert flags["row"].tolist() == [2, 3]
+    assert flags["has_now_name"].tolist() == [False, True]
+    assert flags["is_authorized"].tolist() == [False, False]
+
+
+def test_get_auth_dict_is_memoized(tmp_path):
+    json_path = tmp_path / "专利申请人.json"
+    json_path.write_text('[{"授权公告号": "CN1B"}]', encoding="utf-8")
+    auth_dict = single_checker.get_auth_dict(str(json_path))
+    assert single_checker.get_auth_dict(str(json_path)) is auth_dict
+    assert single_checker.check_authorization_number("CN1B", auth_dict)
+
+
+def test_get_auth_dict_retries_failed_load(tmp_path):
+    json_path = tmp_path / "专利申请人.json"
+    assert single_checker.get_auth_dict(str(json_path)) == {}
+    json_path.write_text('[{"授权公告号": "CN1B"}]', encoding="utf-8")
+    auth_dict = single_checker.get_auth_dict(str(json_path))
+    assert "CN1B" in auth_dict
+    assert single_checker.get_auth_dict(str(json_path)) is auth_dict
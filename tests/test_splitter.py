@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+import csv
+import math
+import os
+
+import pytest
+
+from patent_checker.splitter import chunk_layout, infer_chunk_layout, merge_parts, split_csv
+
+
+def reference_split(input_path, n, check_gap):
+    """原先一次性读入内存的分割实现，用于逐字节对比"""
+    with open(input_path, 'r', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = list(reader)
+    chunk_size = math.ceil(len(rows) / n)
+    chunks = [rows[i*chunk_size : min((i+1)*chunk_size, len(rows))] for i in range(n)]
+    outputs = []
+    for i in range(n):
+        next_chunk = chunks[(i+1) % n]
+        combined = chunks[i] + next_chunk[:math.ceil(len(next_chunk) * check_gap)]
+        outputs.append([header] + combined)
+    return outputs
+
+
+@pytest.mark.parametrize("total_rows, n, check_gap", [(23, 5, 0.2), (10, 1, 0.5), (3, 5, 0.2), (0, 2, 0.2), (17, 4, 0)])
+def test_split_csv_matches_reference(tmp_path, total_rows, n, check_gap):
+    input_path = tmp_path / "data.csv"
+    with open(input_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "have_patent_fixed"])
+        writer.writerows([[f"单位{i}, \"有限\"", i % 2] for i in range(total_rows)])
+
+    expected = reference_split(str(input_path), n, check_gap)
+    split_csv(str(input_path), n, check_gap)
+
+    output_dir = tmp_path / "data_split"
+    assert sorted(os.listdir(output_dir)) == sorted(f"part_{i+1}.csv" for i in range(n))
+    for i, rows in enumerate(expected):
+        reference_path = tmp_path / "reference.csv"
+        with open(reference_path, 'w', newline='', encoding='utf-8-sig') as f:
+            csv.writer(f).writerows(rows)
+        assert (output_dir / f"part_{i+1}.csv").read_bytes() == reference_path.read_bytes()
+
+
+def write_data(path, total_rows):
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "have_patent_fixed"])
+        writer.writerows([[f"单位{i}", i % 2] for i in range(total_rows)])
+
+
+def read_rows(path):
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return list(csv.reader(f))
+
+
+def annotate(part_path, row_index, value):
+    rows = read_rows(part_path)
+    rows[row_index][1] = value
+    with open(part_path, 'w', newline='', encoding='utf-8-sig') as f:
+        csv.writer(f).writerows(rows)
+
+
+@pytest.mark.parametrize("total_rows, n, check_gap", [(23, 5, 0.2), (10, 1, 0.5), (3, 5, 0.2), (0, 2, 0.2), (17, 4, 0)])
+def test_merge_parts_restores_master_order(tmp_path, total_rows, n, check_gap):
+    input_path = tmp_path / "data.csv"
+    write_data(input_path, total_rows)
+    split_csv(str(input_path), n, check_gap)
+
+    stats = merge_parts(str(input_path), n, check_gap)
+    assert read_rows(tmp_path / "data_merged.csv") == read_rows(input_path)
+    assert stats["rows"] == total_rows
+    assert stats["conflicts"] == 0
+
+
+def test_merge_parts_conflict_policies(tmp_path):
+    input_path = tmp_path / "data.csv"
+    write_data(input_path, 20)
+    split_csv(str(input_path), 4, 0.4)
+    split_dir = tmp_path / "data_split"
+    # part_2 开头两行同时出现在 part_1 末尾；part_1 的标注员改了其中第1行
+    annotate(split_dir / "part_1.csv", 6, "9")
+    annotate(split_dir / "part_2.csv", 3, "7")
+
+    stats = merge_parts(str(input_path), 4, 0.4, conflicts_path=str(tmp_path / "conflicts.csv"))
+    merged = read_rows(tmp_path / "data_merged.csv")
+    assert stats == {"rows": 20, "duplicates_removed": 8, "conflicts": 1}
+    assert merged[6] == ["单位5", "1"] and merged[8] == ["单位7", "7"]
+    assert [row[:4] for row in read_rows(tmp_path / "conflicts.csv")[1:]] == [
+        ["6", "part_2.csv", "part_1.csv", "owner"], ["6", "part_2.csv", "part_1.csv", "overlap"]]
+
+    merge_parts(str(input_path), 4, 0.4, policy="overlap")
+    assert read_rows(tmp_path / "data_merged.csv")[6] == ["单位5", "9"]
+
+    with pytest.raises(ValueError):
+        merge_parts(str(input_path), 4, 0.4, policy="error")
+
+
+def test_merge_parts_rejects_changed_row_count(tmp_path):
+    input_path = tmp_path / "data.csv"
+    write_data(input_path, 12)
+    split_csv(str(input_path), 3, 0.25)
+    part_path = tmp_path / "data_split" / "part_2.csv"
+    rows = read_rows(part_path)
+    with open(part_path, 'w', newline='', encoding='utf-8-sig') as f:
+        csv.writer(f).writerows(rows[:3] + rows[4:])
+
+    with pytest.raises(ValueError):
+        merge_parts(str(input_path), 3, 0.25)
+    assert not (tmp_path / "data_merged.csv").exists()
+
+
+@pytest.mark.parametrize("total_rows", [0, 1, 7, 30, 101])
+@pytest.mark.parametrize("n", [1, 3, 5])
+@pytest.mark.parametrize("check_gap", [0, 0.2, 0.5])
+def test_infer_chunk_layout_from_part_rows(total_rows, n, check_gap):
+    chunk_lengths, overlap_sizes = chunk_layout(total_rows, n, check_gap)
+    part_rows = [chunk_lengths[i] + overlap_sizes[(i + 1) % n] for i in range(n)]
+    assert infer_chunk_layout(part_rows, check_gap) == (chunk_lengths, overlap_sizes)
+    # 行数未知（验证失败）的文件不影响推算
+    if n > 1:
+        assert infer_chunk_layout([None] + part_rows[1:], check_gap)[1] == overlap_sizes
+
+
+def test_infer_chunk_layout_rejects_other_files():
+    with pytest.raises(ValueError):
+        infer_chunk_layout([12, 20, 12], 0.2)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import time
+
+from patent_checker import checker
+from patent_checker.watcher import SubmissionWatcher, list_parts
+
+from .conftest import write_csv
+
+
+async def wait_for(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "等待验证结果超时"
+        await asyncio.sleep(0.05)
+
+
+def test_list_parts_orders_by_number(tmp_path):
+    for name in ("part_10.csv", "part_2.csv", "part_1.csv", "part_3.csv.tmp", "notes.csv"):
+        (tmp_path / name).write_text("", encoding='utf-8')
+    assert [path.rsplit("/", 1)[-1] for path in list_parts(str(tmp_path))] == ["part_1.csv", "part_2.csv",
+                                                                                 "part_10.csv"]
+
+
+def test_watcher_validates_submissions_incrementally(tmp_path, auth_json, part_rows):
+    drop_dir = tmp_path / "drop"
+    drop_dir.mkdir()
+    parts = [str(drop_dir / f"part_{i}.csv") for i in (1, 2, 3)]
+    auth_dict = checker.load_authorization_index(auth_json)
+
+    async def scenario():
+        watcher = SubmissionWatcher(str(drop_dir), auth_dict, check_gap=0.5, workers=2, debounce=0.2,
+                                    poll_interval=0.05, summary_path=str(tmp_path / "summary.json"))
+        runner = asyncio.create_task(watcher.run())
+        try:
+            for path, rows in zip(parts, part_rows):
+                write_csv(path, rows)
+            await wait_for(lambda: watcher.summary()["validated"] == 3)
+            first = watcher.summary()
+
+            # 重新提交第3个文件后，第2、3个文件的结果过期并重新验证
+            old_results = dict(first["results"])
+            write_csv(parts[2], [["e", "1", "CN1B"], ["f", "0", "CN2B"], ["a", "1", "CN2B"], ["b", "1", "X"]])
+            await wait_for(lambda: all(watcher.summary()["results"].get(path) is not old_results[path]
+                                       for path in parts[1:]) and watcher.summary()["validated"] == 3)
+            second = watcher.summary()
+            assert second["results"][parts[0]] is old_results[parts[0]]
+            return first, second
+        finally:
+            watcher.stop()
+            await runner
+
+    first, second = asyncio.run(scenario())
+    assert first["avg_existence_rate"] == 0.5
+    assert abs(first["avg_consistency_rate"] - 2 / 3) < 1e-12
+
+    expected = checker.validate_files(parts, check_gap=0.5, auth_dict_path=auth_json)
+    assert second["avg_existence_rate"] == expected["avg_existence_rate"]
+    assert second["avg_consistency_rate"] == expected["avg_consistency_rate"]
+    assert json.loads((tmp_path / "summary.json").read_text(encoding='utf-8'))["validated"] == 3